@@ -18,6 +18,21 @@ from .constants import (
     SIZE_BINS,
     SIZE_BIN_SUFFIXES,
 )
+from .utils.dask_agg import quantile_stats_name
+from .utils.sketches import hll_estimate
+
+
+def decode_categorical_index(df: pd.DataFrame):
+    if isinstance(df.index, pd.MultiIndex):
+        df.index = df.index.set_levels(
+            [
+                level.astype(level.categories.dtype) if isinstance(level, pd.CategoricalIndex) else level
+                for level in df.index.levels
+            ]
+        )
+    elif isinstance(df.index, pd.CategoricalIndex):
+        df.index = df.index.astype(df.index.categories.dtype)
+    return df
 
 
 def fix_dtypes(df: pd.DataFrame):
@@ -48,6 +63,12 @@ def fix_size_values(df: pd.DataFrame):
     return df
 
 
+def reset_index_levels(df: pd.DataFrame):
+    if any(name is not None for name in df.index.names):
+        return df.reset_index()
+    return df
+
+
 def set_app_name(df: pd.DataFrame):
     return df.assign(
         app_name=lambda df: df.index.get_level_values(COL_PROC_NAME)
@@ -121,6 +142,14 @@ def set_proc_name_parts(df: pd.DataFrame):
     ).drop(columns=['proc_name_parts'])
 
 
+def set_quantile_stats(df: pd.DataFrame, ranges):
+    stats_cols = [col for col in df.columns if col[1] == 'quantile_stats']
+    for metric, stats_col in stats_cols:
+        for i, (min, max) in enumerate(ranges):
+            df[(metric, quantile_stats_name(min, max))] = df[(metric, stats_col)].map(lambda stats, i=i: stats[i])
+    return df.drop(columns=stats_cols)
+
+
 def set_size_bins(df: pd.DataFrame):
     df['size_bin_temp'] = pd.cut(
         df['size'],
@@ -135,13 +164,14 @@ def set_size_bins(df: pd.DataFrame):
     return df
 
 
-def set_unique_counts(df: pd.DataFrame, layer: str):
+def set_unique_counts(df: pd.DataFrame, layer: str, approximate: bool = False):
+    count = hll_estimate if approximate else len
     unique_cols = [col for col in df.columns if col.endswith('_unique')]
     for unique_col in unique_cols:
         if COL_FILE_NAME in unique_col and 'posix' not in layer:
             continue
         nunique_col = unique_col.replace('_unique', '_nunique')
-        df[nunique_col] = df[unique_col].map(len).astype('uint64[pyarrow]')
+        df[nunique_col] = df[unique_col].map(count).astype('uint64[pyarrow]')
     return df.drop(columns=unique_cols)
 
 
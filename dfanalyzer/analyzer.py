@@ -1,26 +1,38 @@
 import abc
+import dask
 import dask.dataframe as dd
 import hashlib
 import itertools as it
 import json
+import logging
 import math
 import numpy as np
 import os
 import pandas as pd
+import re
 from dask import compute, persist
 from dask.distributed import fire_and_forget, get_client, wait
 from typing import Callable, Dict, List, Optional, Tuple
 
 from .analysis_utils import (
+    decode_categorical_index,
     fix_dtypes,
+    reset_index_levels,
     set_file_dir,
     set_file_pattern,
+    set_quantile_stats,
     set_size_bins,
     set_unique_counts,
     split_duration_records_vectorized,
 )
 from .config import CHECKPOINT_VIEWS, HASH_CHECKPOINT_NAMES, AnalyzerPresetConfig
 from .constants import (
+    COL_CATEGORY,
+    COL_FILE_NAME,
+    COL_FUNC_NAME,
+    COL_HOST_NAME,
+    COL_LAYER,
+    COL_LAYER_MASK,
     COL_PROC_NAME,
     COL_TIME_END,
     COL_TIME_START,
@@ -42,15 +54,24 @@ from .types import (
     ViewType,
     Views,
 )
-from .utils.dask_agg import quantile_stats, unique_set, unique_set_flatten
+from .utils.dask_agg import (
+    empty_codes,
+    quantile_stats,
+    unique_codes,
+    unique_codes_flatten,
+    unique_sketch,
+    unique_sketch_flatten,
+)
 from .utils.dask_utils import event_logger, flatten_column_names
 from .utils.expr_utils import extract_numerator_and_denominators
 from .utils.file_utils import ensure_dir
 from .utils.json_encoders import NpEncoder
 
 
+CATEGORICAL_COLS = [COL_CATEGORY, COL_FILE_NAME, COL_FUNC_NAME, COL_HOST_NAME, COL_PROC_NAME]
 CHECKPOINT_FLAT_VIEW = "_flat_view"
 CHECKPOINT_HLM = "_hlm"
+CHECKPOINT_HLM_FILES = "_hlm_files"
 CHECKPOINT_MAIN_VIEW = "_main_view"
 CHECKPOINT_RAW_STATS = "_raw_stats"
 CHECKPOINT_VIEW = "_view"
@@ -61,6 +82,7 @@ HLM_AGG = {
 }
 HLM_EXTRA_COLS = ["cat", "io_cat", "acc_pat", "func_name"]
 PARTITION_SIZE = "128MB"
+QUANTILE_STATS_RANGES = [(0.01, 0.99), (0.05, 0.95), (0.1, 0.9), (0.25, 0.75)]
 VIEW_PERMUTATIONS = False
 
 
@@ -68,9 +90,14 @@ class Analyzer(abc.ABC):
     def __init__(
         self,
         preset: AnalyzerPresetConfig,
+        approximate_unique: bool = False,
+        categorical_strings: bool = False,
         checkpoint: bool = True,
         checkpoint_dir: str = "",
         debug: bool = False,
+        exact_quantiles: bool = False,
+        incremental: bool = False,
+        streaming: bool = False,
         time_approximate: bool = True,
         time_granularity: float = 1e6,
         time_resolution: float = 1e6,
@@ -81,9 +108,20 @@ class Analyzer(abc.ABC):
 
         Args:
             preset: The configuration preset for the analyzer.
+            approximate_unique: Whether to estimate the distinct counts with
+                HyperLogLog sketches instead of carrying the exact sets.
+            categorical_strings: Whether to dictionary-encode the string columns
+                (e.g. file and process names) as categoricals until the flat views.
             checkpoint: Whether to enable checkpointing of intermediate results.
             checkpoint_dir: Directory to store checkpoint data.
             debug: Whether to enable debug mode.
+            exact_quantiles: Whether to compute the trimmed view statistics from
+                the exact values instead of t-digest sketches.
+            incremental: Whether to fold only the trace files that are new since
+                the last run into the checkpointed high-level metrics.
+            streaming: Whether to read the traces in chunks and fold each chunk
+                into the high-level metrics before reading the next, so that
+                traces larger than the cluster memory can be analyzed.
             time_approximate: Whether to use approximate time for I/O operations.
             time_granularity: The time granularity for analysis, in microseconds.
             time_resolution: The time resolution for analysis, in microseconds.
@@ -92,20 +130,33 @@ class Analyzer(abc.ABC):
         """
         if checkpoint:
             assert checkpoint_dir != "", "Checkpoint directory must be defined"
+        if incremental and not checkpoint:
+            raise ValueError("Incremental analysis requires checkpointing to be enabled.")
+        if incremental and categorical_strings:
+            raise ValueError("Incremental analysis does not support categorical strings.")
+        if streaming and categorical_strings:
+            raise ValueError("Streaming analysis does not support categorical strings.")
 
         self.additional_metrics = preset.additional_metrics or {}
+        self.approximate_unique = approximate_unique
+        self.categorical_strings = categorical_strings
         self.checkpoint = checkpoint
         self.checkpoint_dir = checkpoint_dir
         self.debug = debug
         self.derived_metrics = preset.derived_metrics or {}
+        self.exact_quantiles = exact_quantiles
+        self.incremental = incremental
         self.layer_defs = preset.layer_defs
         self.layer_deps = preset.layer_deps or {}
         self.layers = list(preset.layer_defs.keys())
         self.logical_views = preset.logical_views or {}
         self.preset = preset
         self.threaded_layers = preset.threaded_layers or []
+        self.refresh_checkpoints = False
+        self.streaming = streaming
         self.time_approximate = time_approximate
         self.time_granularity = time_granularity
+        self.time_origin = None
         self.time_resolution = time_resolution
         self.time_sliced = time_sliced
         self.unscored_metrics = preset.unscored_metrics or []
@@ -158,24 +209,56 @@ class Analyzer(abc.ABC):
         # Check if high-level metrics are checkpointed
         hlm_view_types = list(sorted(view_types))
         hlm_checkpoint_name = self.get_hlm_checkpoint_name(view_types=hlm_view_types)
+        has_hlm_checkpoint = self.checkpoint and self.has_checkpoint(name=hlm_checkpoint_name)
+        self.refresh_checkpoints = False
+        self.time_origin = None
+
+        # Find the trace files that are not folded into the high-level metrics yet
+        trace_files = None
+        trace_fingerprints = None
+        new_trace_files = []
+        if self.incremental:
+            trace_files = self.list_trace_files(trace_path=trace_path)
+        if trace_files is not None:
+            # Fingerprint the files as listed, so that a file that grows while it is
+            # read is seen as changed by the next run instead of as fully folded in
+            trace_fingerprints = self.fingerprint_trace_files(trace_files=trace_files)
+            new_trace_files = trace_files
+            if has_hlm_checkpoint:
+                new_trace_files = self.get_new_trace_files(
+                    view_types=hlm_view_types,
+                    trace_fingerprints=trace_fingerprints,
+                )
+            if new_trace_files is None:
+                logging.info("Previously analyzed trace files have changed, recomputing high-level metrics")
+                has_hlm_checkpoint = False
+                new_trace_files = trace_files
+            self.refresh_checkpoints = len(new_trace_files) > 0
+
+        # Find the trace chunks to fold into the high-level metrics one at a time
+        trace_chunks = None
+        if self.streaming and not has_hlm_checkpoint:
+            trace_chunks = self.list_trace_chunks(trace_path=trace_path if trace_files is None else trace_files)
+            if trace_chunks is None:
+                logging.warning("Streaming is not supported for these traces, reading them at once")
+
         traces = None
         raw_stats = None
-        if not self.checkpoint or not self.has_checkpoint(name=hlm_checkpoint_name):
-            # Read trace & stats
+        needed_columns = self.get_trace_columns(view_types=hlm_view_types) + list(extra_columns or {})
+        if trace_chunks is None and (not has_hlm_checkpoint or len(new_trace_files) > 0):
+            # Read trace & stats, of exactly the listed files if they are tracked
             traces = self.read_trace(
-                trace_path=trace_path,
+                trace_path=trace_path if trace_files is None else new_trace_files,
                 extra_columns=extra_columns,
                 extra_columns_fn=extra_columns_fn,
+                needed_columns=needed_columns,
             )
-            raw_stats = self.read_stats(traces=traces)
-            traces = self.postread_trace(traces=traces, view_types=hlm_view_types).map_partitions(set_size_bins)
-            if self.time_sliced:
-                traces = traces.map_partitions(
-                    split_duration_records_vectorized,
-                    time_granularity=self.time_granularity / self.time_resolution,
-                    time_resolution=self.time_resolution,
-                )
-        else:
+            if has_hlm_checkpoint:
+                raw_stats = self.update_stats(traces=traces)
+            else:
+                raw_stats = self.read_stats(traces=traces, force=self.refresh_checkpoints)
+            traces = self.prepare_trace(traces=traces, view_types=hlm_view_types)
+        elif trace_chunks is None:
             # Restore stats
             raw_stats = self.restore_extra_data(
                 name=self.get_stats_checkpoint_name(),
@@ -183,32 +266,57 @@ class Analyzer(abc.ABC):
             )
 
         # Compute high-level metrics
-        hlm = self.compute_high_level_metrics(
-            checkpoint_name=hlm_checkpoint_name,
-            traces=traces,
-            view_types=hlm_view_types,
-        )
+        if trace_chunks is not None:
+            logging.info(f"Streaming high-level metrics of {len(trace_chunks)} trace chunks")
+            hlm, raw_stats = self.stream_high_level_metrics(
+                checkpoint_name=hlm_checkpoint_name,
+                extra_columns=extra_columns,
+                extra_columns_fn=extra_columns_fn,
+                needed_columns=needed_columns,
+                trace_chunks=trace_chunks,
+                view_types=hlm_view_types,
+            )
+        elif has_hlm_checkpoint and len(new_trace_files) > 0:
+            logging.info(f"Folding {len(new_trace_files)} new trace files into high-level metrics")
+            hlm = self.update_high_level_metrics(
+                checkpoint_name=hlm_checkpoint_name,
+                traces=traces,
+                view_types=hlm_view_types,
+            )
+        else:
+            hlm = self.compute_high_level_metrics(
+                checkpoint_name=hlm_checkpoint_name,
+                force=self.refresh_checkpoints,
+                traces=traces,
+                view_types=hlm_view_types,
+            )
+        if self.refresh_checkpoints:
+            self.store_trace_files(view_types=hlm_view_types, trace_fingerprints=trace_fingerprints)
         (hlm, raw_stats) = persist(hlm, raw_stats)
         wait([hlm, raw_stats])
 
         # Validate time granularity
         # self.validate_time_granularity(hlm=hlm, view_types=hlm_view_types)
 
+        # Tag the layers of each record once
+        hlm = hlm.map_partitions(
+            self.set_layer_mask,
+            layer_defs=self.layer_defs,
+            meta=self.set_layer_mask(hlm._meta.copy(), layer_defs=self.layer_defs),
+        ).persist()
+
+        # Compute main views of all layers in a single pass
+        layer_main_views = self.compute_main_views(hlm=hlm, view_types=view_types)
+
         # Compute layers & views
         hlms = {}
         main_views = {}
         main_indexes = {}
         views = {}
         view_keys = set()
-        for layer, layer_condition in self.layer_defs.items():
-            layer_hlm = hlm.copy()
-            if layer_condition:
-                layer_hlm = hlm.query(layer_condition)
-            layer_main_view = self.compute_main_view(
-                layer=layer,
-                hlm=layer_hlm,
-                view_types=view_types,
-            )
+        for layer_index, layer in enumerate(self.layer_defs):
+            layer_hlm = hlm[(hlm[COL_LAYER_MASK] & (1 << layer_index)) > 0].drop(columns=[COL_LAYER_MASK])
+            layer_main_view = layer_main_views[layer]
             layer_main_index = layer_main_view.index.to_frame().reset_index(drop=True)
             layer_views = self.compute_views(
                 layer=layer,
@@ -236,6 +344,10 @@ class Analyzer(abc.ABC):
             view_keys.update(layer_views.keys())
 
         (views, raw_stats) = compute(views, raw_stats)
+        if self.categorical_strings:
+            for layer in views:
+                for view_key in views[layer]:
+                    views[layer][view_key] = decode_categorical_index(views[layer][view_key])
 
         # Restore checkpointed flat views if available
         checkpointed_flat_views = {}
@@ -243,7 +355,7 @@ class Analyzer(abc.ABC):
             for view_key in view_keys:
                 flat_view_checkpoint_name = self.get_checkpoint_name(CHECKPOINT_FLAT_VIEW, *list(view_key))
                 flat_view_checkpoint_path = self.get_checkpoint_path(name=flat_view_checkpoint_name)
-                if self.has_checkpoint(name=flat_view_checkpoint_name):
+                if not self.refresh_checkpoints and self.has_checkpoint(name=flat_view_checkpoint_name):
                     checkpointed_flat_views[view_key] = pd.read_parquet(f"{flat_view_checkpoint_path}.parquet")
 
         # Process views to create flat views
@@ -305,7 +417,7 @@ class Analyzer(abc.ABC):
             views=views,
         )
 
-    def read_stats(self, traces: dd.DataFrame) -> RawStats:
+    def read_stats(self, traces: dd.DataFrame, force: bool = False) -> RawStats:
         """Computes and restores raw statistics from the trace data.
 
         Calculates job time and total event count from the traces.
@@ -314,6 +426,7 @@ class Analyzer(abc.ABC):
 
         Args:
             traces: A Dask DataFrame containing the I/O trace data.
+            force: If True, recomputes the stats even if a checkpoint exists.
 
         Returns:
             A RawStats dictionary containing 'job_time', 'time_granularity',
@@ -330,16 +443,129 @@ class Analyzer(abc.ABC):
                     time_resolution=self.time_resolution,
                     total_count=total_count,
                 ),
+                force=force,
+            )
+        )
+        return raw_stats
+
+    def update_stats(self, traces: dd.DataFrame) -> RawStats:
+        """Folds the raw statistics of newly read traces into the checkpointed ones.
+
+        The new traces are expected to share the time origin of the
+        checkpointed ones, so the job time spans from that origin to the
+        latest end time of either.
+
+        Args:
+            traces: A Dask DataFrame containing the new I/O trace data.
+
+        Returns:
+            A RawStats dictionary containing 'job_time', 'time_granularity',
+            and 'total_count'.
+        """
+        stats_path = f"{self.get_checkpoint_path(name=self.get_stats_checkpoint_name())}.json"
+        if not os.path.exists(stats_path):
+            return self.read_stats(traces=traces, force=True)
+        with open(stats_path, "r") as f:
+            stats = json.load(f)
+        job_time = self.compute_job_time(traces=traces.assign(**{COL_TIME_START: 0}))
+        total_count = self.compute_total_count(traces=traces)
+        raw_stats = RawStats(
+            **self.restore_extra_data(
+                name=self.get_stats_checkpoint_name(),
+                fallback=lambda: dict(
+                    job_time=dask.delayed(max)(stats["job_time"], job_time),
+                    time_granularity=self.time_granularity,
+                    time_resolution=self.time_resolution,
+                    total_count=total_count + stats["total_count"],
+                ),
+                force=True,
             )
         )
         return raw_stats
 
+    def list_trace_chunks(self, trace_path: str) -> Optional[List[List[str]]]:
+        """Splits the trace files into chunks that are read one at a time while streaming.
+
+        Readers that cannot read a subset of the traces return None, which
+        disables streaming.
+
+        Args:
+            trace_path: Path to the I/O trace file or directory.
+
+        Returns:
+            A list of trace file lists, or None if the reader does not support it.
+        """
+        return None
+
+    def get_time_origin(
+        self,
+        trace_chunks: List[List[str]],
+        extra_columns: Optional[Dict[str, str]],
+        extra_columns_fn: Optional[Callable[[dict], dict]],
+        needed_columns: Optional[List[str]] = None,
+    ) -> Optional[int]:
+        """Finds the time origin shared by all trace chunks.
+
+        Readers that normalize timestamps by the earliest event override this
+        so that streamed chunks get the same time ranges as reading the traces
+        at once. By default, there is no time origin.
+        """
+        return None
+
+    def release_trace(self):
+        """Drops the references to the traces that were read last.
+
+        Readers that keep persisted frames of the traces they read override
+        this, so that streaming frees each chunk before reading the next one.
+        By default, there is nothing to release.
+        """
+        pass
+
+    def list_trace_files(self, trace_path: str) -> Optional[List[str]]:
+        """Lists the trace files that make up the given trace path.
+
+        Readers that can read an explicit list of files override this to
+        support incremental analysis.
+
+        Args:
+            trace_path: Path to the I/O trace file or directory.
+
+        Returns:
+            A list of trace file paths, or None if the reader does not support it.
+        """
+        return None
+
+    def get_trace_columns(self, view_types: List[ViewType]) -> List[str]:
+        """Lists the trace columns that the analysis needs.
+
+        The columns are derived from the view types, the high-level metric
+        aggregations and the names referenced by the preset's layer
+        definitions, derived metrics and logical views. Readers use them to
+        skip every other column at the source.
+
+        Args:
+            view_types: A list of view types to compute.
+
+        Returns:
+            A sorted list of column names, in the naming of the analysis.
+        """
+        columns = set(view_types).union(VIEW_TYPES, HLM_EXTRA_COLS, HLM_AGG, [COL_TIME_START, COL_TIME_END])
+        exprs = list(self.layer_defs.values())
+        exprs.extend(expr for metrics in self.derived_metrics.values() for expr in metrics.values())
+        exprs.extend(expr for views in self.logical_views.values() for expr in views.values())
+        for expr in exprs:
+            if expr:
+                # String literals are not column names
+                columns.update(re.findall(r"[A-Za-z_]\w*", re.sub(r"(['\"]).*?\1", "", expr)))
+        return sorted(columns)
+
     @abc.abstractmethod
     def read_trace(
         self,
         trace_path: str,
         extra_columns: Optional[Dict[str, str]],
         extra_columns_fn: Optional[Callable[[dict], dict]],
+        needed_columns: Optional[List[str]] = None,
     ) -> dd.DataFrame:
         """Reads I/O trace data from the specified path.
 
@@ -348,6 +574,9 @@ class Analyzer(abc.ABC):
 
         Args:
             trace_path: Path to the I/O trace file or directory.
+            needed_columns: The columns the analysis needs, see
+                `get_trace_columns`. Readers may skip any other column at the
+                source; None reads all columns.
 
         Returns:
             A Dask DataFrame containing the parsed I/O trace data.
@@ -372,6 +601,52 @@ class Analyzer(abc.ABC):
         """
         return traces
 
+    def prepare_trace(self, traces: dd.DataFrame, view_types: List[ViewType]) -> dd.DataFrame:
+        """Post-processes the raw traces into the records that high-level metrics are computed from.
+
+        Args:
+            traces: A Dask DataFrame containing the raw I/O trace data.
+            view_types: A list of view types to compute.
+
+        Returns:
+            A Dask DataFrame with size bins, and categorized or time-sliced
+            records if enabled.
+        """
+        traces = self.postread_trace(traces=traces, view_types=view_types).map_partitions(set_size_bins)
+        if self.categorical_strings:
+            traces = self.categorize_trace(traces=traces)
+        if self.time_sliced:
+            traces = traces.map_partitions(
+                split_duration_records_vectorized,
+                time_granularity=self.time_granularity / self.time_resolution,
+                time_resolution=self.time_resolution,
+            )
+        return traces
+
+    def categorize_trace(self, traces: dd.DataFrame) -> dd.DataFrame:
+        """Dictionary-encodes the string columns of the trace data.
+
+        Columns that are already categorical with known categories (e.g. set
+        while reading the traces) are kept as is, the rest are categorized
+        in a single pass over the traces.
+
+        Args:
+            traces: A Dask DataFrame containing the I/O trace data.
+
+        Returns:
+            A Dask DataFrame whose string columns are categoricals.
+        """
+        categorical_cols = []
+        for col in CATEGORICAL_COLS:
+            if col not in traces.columns:
+                continue
+            if isinstance(traces.dtypes[col], pd.CategoricalDtype) and traces[col].cat.known:
+                continue
+            categorical_cols.append(col)
+        if len(categorical_cols) == 0:
+            return traces
+        return traces.categorize(columns=categorical_cols)
+
     def compute_job_time(self, traces: dd.DataFrame) -> float:
         """Computes the total job execution time from the traces.
 
@@ -402,6 +677,7 @@ class Analyzer(abc.ABC):
         view_types: List[ViewType],
         partition_size: str = PARTITION_SIZE,
         checkpoint_name: Optional[str] = None,
+        force: bool = False,
     ) -> dd.DataFrame:
         """Computes high-level metrics by aggregating trace data.
 
@@ -412,6 +688,7 @@ class Analyzer(abc.ABC):
             traces: A Dask DataFrame containing the I/O trace data.
             view_types: A list of column names to group by for aggregation.
             partition_size: The desired partition size for the resulting Dask DataFrame.
+            force: If True, recomputes the metrics even if a checkpoint exists.
 
         Returns:
             A Dask DataFrame containing the computed high-level metrics.
@@ -424,39 +701,173 @@ class Analyzer(abc.ABC):
                 traces=traces,
                 view_types=view_types,
             ),
+            force=force,
         )
 
-    @event_logger(key=EventType.COMPUTE_MAIN_VIEW, message="Compute main view")
-    def compute_main_view(
+    @event_logger(key=EventType.COMPUTE_HLM, message="Update high-level metrics")
+    def update_high_level_metrics(
         self,
-        layer: Layer,
-        hlm: dd.DataFrame,
+        checkpoint_name: str,
+        traces: dd.DataFrame,
         view_types: List[ViewType],
         partition_size: str = PARTITION_SIZE,
     ) -> dd.DataFrame:
-        """Computes the main aggregated view from high-level metrics.
+        """Folds the high-level metrics of newly read traces into the checkpointed ones.
 
-        This method takes the high-level metrics, sets derived columns,
-        and then groups by the specified view_types to create a primary
-        aggregated view of the I/O performance data.
+        The metrics of the new traces are computed on their own and merged with
+        the checkpoint using the same sum and set-union semantics, then the
+        checkpoint is overwritten with the result.
 
         Args:
-            hlm: A Dask DataFrame containing high-level metrics.
-            view_types: A list of view types to group by for the main view.
+            checkpoint_name: The name of the high-level metrics checkpoint.
+            traces: A Dask DataFrame containing the new I/O trace data.
+            view_types: A list of column names to group by for aggregation.
             partition_size: The desired partition size for the resulting Dask DataFrame.
 
         Returns:
-            A Dask DataFrame representing the main aggregated view.
+            A Dask DataFrame containing the merged high-level metrics.
         """
-        return self.restore_view(
-            name=self.get_checkpoint_name(CHECKPOINT_MAIN_VIEW, str(layer), *sorted(view_types)),
-            fallback=lambda: self._compute_main_view(
-                hlm=hlm,
-                layer=layer,
+        new_hlm = self._compute_high_level_metrics(
+            partition_size=partition_size,
+            traces=traces,
+            view_types=view_types,
+        )
+        hlm = self._merge_high_level_metrics(
+            hlms=[dd.read_parquet(self.get_checkpoint_path(name=checkpoint_name)), new_hlm],
+            partition_size=partition_size,
+            view_types=view_types,
+        )
+        wait(hlm)
+        self.store_view(name=checkpoint_name, view=hlm, overwrite=True)
+        return hlm
+
+    @event_logger(key=EventType.COMPUTE_HLM, message="Stream high-level metrics")
+    def stream_high_level_metrics(
+        self,
+        checkpoint_name: str,
+        extra_columns: Optional[Dict[str, str]],
+        extra_columns_fn: Optional[Callable[[dict], dict]],
+        needed_columns: Optional[List[str]],
+        trace_chunks: List[List[str]],
+        view_types: List[ViewType],
+        partition_size: str = PARTITION_SIZE,
+    ) -> Tuple[dd.DataFrame, RawStats]:
+        """Computes high-level metrics by folding the trace chunks in one at a time.
+
+        Each chunk is read, aggregated and merged into the running metrics with
+        the same sum and set-union semantics as incremental analysis, then
+        released before the next chunk is read. Peak memory is therefore
+        bounded by the size of the metrics and a single chunk rather than the
+        whole trace. All chunks share the time origin of the whole trace, so the
+        results match reading the traces at once.
+
+        Args:
+            checkpoint_name: The name of the high-level metrics checkpoint.
+            extra_columns: Extra columns to read from the traces.
+            extra_columns_fn: A function that extracts the extra columns.
+            needed_columns: The columns the analysis needs.
+            trace_chunks: The trace files of each chunk.
+            view_types: A list of column names to group by for aggregation.
+            partition_size: The desired partition size for the resulting Dask DataFrame.
+
+        Returns:
+            The high-level metrics and the raw statistics of all chunks.
+        """
+        self.time_origin = self.get_time_origin(
+            trace_chunks=trace_chunks,
+            extra_columns=extra_columns,
+            extra_columns_fn=extra_columns_fn,
+            needed_columns=needed_columns,
+        )
+        hlm = None
+        job_time = 0.0
+        total_count = 0
+        for chunk_index, trace_chunk in enumerate(trace_chunks):
+            logging.info(f"Streaming trace chunk {chunk_index + 1}/{len(trace_chunks)} of {len(trace_chunk)} files")
+            traces = self.read_trace(
+                trace_path=trace_chunk,
+                extra_columns=extra_columns,
+                extra_columns_fn=extra_columns_fn,
+                needed_columns=needed_columns,
+            )
+            # Chunks share the time origin, so the job time spans from it to the latest end time
+            chunk_job_time, chunk_total_count = compute(
+                self.compute_job_time(traces=traces.assign(**{COL_TIME_START: 0})),
+                self.compute_total_count(traces=traces),
+            )
+            job_time = max(job_time, float(chunk_job_time))
+            total_count += int(chunk_total_count)
+            chunk_hlm = self._compute_high_level_metrics(
                 partition_size=partition_size,
+                traces=self.prepare_trace(traces=traces, view_types=view_types),
                 view_types=view_types,
-            ),
+            )
+            if hlm is not None:
+                chunk_hlm = self._merge_high_level_metrics(
+                    hlms=[hlm, chunk_hlm],
+                    partition_size=partition_size,
+                    view_types=view_types,
+                )
+            wait(chunk_hlm)
+            hlm = chunk_hlm
+            # The chunk is folded into the metrics, so its traces are freed before the next chunk is read
+            del traces
+            self.release_trace()
+        raw_stats = RawStats(
+            **self.restore_extra_data(
+                name=self.get_stats_checkpoint_name(),
+                fallback=lambda: dict(
+                    job_time=job_time,
+                    time_granularity=self.time_granularity,
+                    time_resolution=self.time_resolution,
+                    total_count=total_count,
+                ),
+                force=True,
+            )
         )
+        hlm = self.restore_view(name=checkpoint_name, fallback=lambda: hlm, force=True)
+        return hlm, raw_stats
+
+    @event_logger(key=EventType.COMPUTE_MAIN_VIEW, message="Compute main views")
+    def compute_main_views(
+        self,
+        hlm: dd.DataFrame,
+        view_types: List[ViewType],
+        partition_size: str = PARTITION_SIZE,
+    ) -> Dict[Layer, dd.DataFrame]:
+        """Computes the main aggregated views of all layers from high-level metrics.
+
+        The records of every layer, tagged by `set_layer_mask`, are set their
+        derived layer columns and grouped by the layer and the specified
+        view_types in a single pass. The main view of each layer is then
+        sliced out of that result.
+
+        Args:
+            hlm: A Dask DataFrame containing the layer-tagged high-level metrics.
+            view_types: A list of view types to group by for the main views.
+            partition_size: The desired partition size for the resulting Dask DataFrames.
+
+        Returns:
+            A dictionary mapping each layer to its main aggregated view.
+        """
+        layered_main_view = {}
+
+        def fallback(layer: Layer) -> dd.DataFrame:
+            if "main_view" not in layered_main_view:
+                layered_main_view["main_view"] = self._compute_layered_main_view(
+                    hlm=hlm,
+                    partition_size=partition_size,
+                    view_types=view_types,
+                )
+            return self._select_main_view(layered_main_view["main_view"], hlm=hlm, layer=layer)
+
+        return {
+            layer: self.restore_view(
+                name=self.get_checkpoint_name(CHECKPOINT_MAIN_VIEW, str(layer), *sorted(view_types)),
+                fallback=lambda layer=layer: fallback(layer),
+            )
+            for layer in self.layer_defs
+        }
 
     def compute_views(
         self,
@@ -548,9 +959,15 @@ class Analyzer(abc.ABC):
                 view_condition = self.logical_views[parent_view_type][view_type]
                 if view_condition is None:
                     if view_type == "file_dir":
-                        parent_records = parent_records.map_partitions(set_file_dir)
+                        parent_records = parent_records.map_partitions(
+                            set_file_dir,
+                            meta=set_file_dir(parent_records._meta),
+                        )
                     elif view_type == "file_pattern":
-                        parent_records = parent_records.map_partitions(set_file_pattern)
+                        parent_records = parent_records.map_partitions(
+                            set_file_pattern,
+                            meta=set_file_pattern(parent_records._meta),
+                        )
                     else:
                         raise ValueError("XXX")
                 else:
@@ -640,6 +1057,63 @@ class Analyzer(abc.ABC):
     def get_hlm_checkpoint_name(self, view_types: List[ViewType]) -> str:
         return self.get_checkpoint_name(CHECKPOINT_HLM, *sorted(view_types))
 
+    def get_hlm_files_checkpoint_name(self, view_types: List[ViewType]) -> str:
+        return self.get_checkpoint_name(CHECKPOINT_HLM_FILES, *sorted(view_types))
+
+    def get_new_trace_files(
+        self,
+        view_types: List[ViewType],
+        trace_fingerprints: Dict[str, List[int]],
+    ) -> Optional[List[str]]:
+        """Finds the trace files that are not folded into the checkpointed high-level metrics.
+
+        The files recorded by `store_trace_files` are compared by size and
+        modification time. If one of them has changed or disappeared, the
+        checkpoint cannot be updated incrementally.
+
+        Args:
+            view_types: The view types of the high-level metrics checkpoint.
+            trace_fingerprints: The size and modification time of each
+                currently listed trace file, see `fingerprint_trace_files`.
+
+        Returns:
+            The list of new trace files, or None if the checkpoint must be recomputed.
+        """
+        data_path = f"{self.get_checkpoint_path(name=self.get_hlm_files_checkpoint_name(view_types))}.json"
+        if not os.path.exists(data_path):
+            return None
+        with open(data_path, "r") as f:
+            data = json.load(f)
+        for trace_file, fingerprint in data["trace_files"].items():
+            if trace_fingerprints.get(trace_file) != fingerprint:
+                return None
+        self.time_origin = data["time_origin"]
+        return [trace_file for trace_file in trace_fingerprints if trace_file not in data["trace_files"]]
+
+    @staticmethod
+    def fingerprint_trace_files(trace_files: List[str]) -> Dict[str, List[int]]:
+        fingerprints = {}
+        for trace_file in trace_files:
+            stat = os.stat(trace_file)
+            fingerprints[trace_file] = [stat.st_size, stat.st_mtime_ns]
+        return fingerprints
+
+    def store_trace_files(self, view_types: List[ViewType], trace_fingerprints: Dict[str, List[int]]):
+        """Records the trace files folded into the high-level metrics checkpoint.
+
+        Args:
+            view_types: The view types of the high-level metrics checkpoint.
+            trace_fingerprints: The fingerprints of the trace files folded into
+                the checkpoint, taken when they were listed.
+        """
+        time_origin = compute(self.time_origin)[0]
+        data = dict(
+            time_origin=None if time_origin is None else int(time_origin),
+            trace_files=trace_fingerprints,
+        )
+        data_path = f"{self.get_checkpoint_path(name=self.get_hlm_files_checkpoint_name(view_types))}.json"
+        self.store_extra_data(data=(data,), data_path=data_path)
+
     def get_stats_checkpoint_name(self):
         return self.get_checkpoint_name(CHECKPOINT_RAW_STATS)
 
@@ -710,9 +1184,10 @@ class Analyzer(abc.ABC):
     ) -> dd.DataFrame:
         """Restores a Dask DataFrame view from a Parquet checkpoint.
 
-        If checkpointing is enabled and the checkpoint exists (unless 'force' is True),
-        it reads the DataFrame from the Parquet store. Otherwise, it calls the
-        'fallback' function to compute the DataFrame. If 'write_to_disk' is True,
+        If checkpointing is enabled and the checkpoint exists (unless 'force' is True
+        or new trace files were folded into the high-level metrics), it reads the
+        DataFrame from the Parquet store. Otherwise, it calls the 'fallback'
+        function to compute the DataFrame. If 'write_to_disk' is True,
         the computed DataFrame is then stored as a checkpoint.
 
         Args:
@@ -726,11 +1201,11 @@ class Analyzer(abc.ABC):
         """
         if self.checkpoint:
             view_path = self.get_checkpoint_path(name=name)
-            if force or not self.has_checkpoint(name=name):
+            if force or self.refresh_checkpoints or not self.has_checkpoint(name=name):
                 view = fallback()
                 if not write_to_disk:
                     return view
-                self.store_view(name=name, view=view)
+                self.store_view(name=name, view=view, overwrite=self.refresh_checkpoints)
                 if not read_from_disk:
                     return view
                 get_client().cancel(view)
@@ -749,12 +1224,50 @@ class Analyzer(abc.ABC):
                 metric_col = f"{metric}_{col}"
                 hlm[metric_col] = pd.NA
                 if hlm.dtypes[col].name == "object":
-                    hlm[metric_col] = hlm[metric_col].map(lambda x: set())
+                    hlm[metric_col] = hlm[metric_col].map(lambda x: empty_codes())
                 hlm[metric_col] = hlm[metric_col].mask(hlm.eval(condition), hlm[col])
                 if hlm.dtypes[col].name != "object":
                     hlm[metric_col] = pd.to_numeric(hlm[metric_col], errors="coerce")
         return hlm
 
+    @staticmethod
+    def set_layer_mask(hlm: pd.DataFrame, layer_defs: Dict[Layer, Optional[str]]) -> pd.DataFrame:
+        layer_mask = np.zeros(len(hlm), dtype=np.uint64)
+        for layer_index, layer_condition in enumerate(layer_defs.values()):
+            layer_bit = np.uint64(1 << layer_index)
+            if layer_condition:
+                layer_mask[hlm.eval(layer_condition).fillna(False).to_numpy(dtype=bool)] |= layer_bit
+            else:
+                layer_mask |= layer_bit
+        hlm[COL_LAYER_MASK] = layer_mask
+        return hlm
+
+    @staticmethod
+    def set_layers(
+        hlm: pd.DataFrame,
+        layers: List[Layer],
+        derived_metrics: Dict[Layer, Dict[str, str]],
+        selected_layers: Optional[List[Layer]] = None,
+    ) -> pd.DataFrame:
+        layer_hlms = []
+        for layer in selected_layers or layers:
+            layer_bit = np.uint64(1 << layers.index(layer))
+            layer_hlm = hlm[(hlm[COL_LAYER_MASK].to_numpy() & layer_bit) > 0].drop(columns=[COL_LAYER_MASK])
+            if "posix" not in layer.lower():
+                size_cols = [col for col in layer_hlm.columns if col.startswith("size")]
+                layer_hlm = layer_hlm.drop(columns=size_cols)
+                if "file_name" in layer_hlm.columns:
+                    layer_hlm = layer_hlm.drop(columns=["file_name"])
+            layer_hlm = Analyzer.set_layer_metrics(layer_hlm, derived_metrics=derived_metrics[layer])
+            layer_hlm[COL_LAYER] = pd.Categorical([layer] * len(layer_hlm), categories=layers)
+            layer_hlms.append(layer_hlm)
+        return pd.concat(layer_hlms)
+
+    @staticmethod
+    def select_layer(main_view: pd.DataFrame, layer: Layer, columns: List[str]) -> pd.DataFrame:
+        layer_mask = main_view.index.get_level_values(COL_LAYER) == layer
+        return main_view[layer_mask].droplevel(COL_LAYER)[columns]
+
     @staticmethod
     def store_extra_data(data: Tuple[Dict], data_path: str):
         """Saves extra (non-DataFrame) data to a JSON file.
@@ -768,7 +1281,7 @@ class Analyzer(abc.ABC):
         with open(data_path, "w") as f:
             return json.dump(data[0], f, cls=NpEncoder)
 
-    def store_view(self, name: str, view: dd.DataFrame, compute=True, partition_size="64MB"):
+    def store_view(self, name: str, view: dd.DataFrame, compute=True, partition_size="64MB", overwrite=False):
         """Stores a Dask DataFrame view to a Parquet checkpoint.
 
         The view DataFrame is repartitioned and then written to a subdirectory
@@ -779,16 +1292,19 @@ class Analyzer(abc.ABC):
             view: The Dask DataFrame to store.
             compute: Whether to compute the DataFrame before writing (Dask default is True).
             partition_size: The desired partition size for the output Parquet files.
+            overwrite: Whether to replace an existing checkpoint.
 
         Returns:
             The result of the Dask `to_parquet` operation.
         """
         for col in view.columns:
-            if view.dtypes[col].name == "object":
+            # Unique code arrays are stored as lists so that they can be merged again
+            if view.dtypes[col].name == "object" and not any(map(col.endswith, VIEW_TYPES)):
                 view[col] = view[col].astype(str)
         return view.repartition(partition_size=partition_size).to_parquet(
             self.get_checkpoint_path(name=name),
             compute=compute,
+            overwrite=overwrite,
             write_metadata_file=True,
         )
 
@@ -836,9 +1352,10 @@ class Analyzer(abc.ABC):
         view_types_diff = list(set(VIEW_TYPES).difference(view_types))
         hlm_agg = dict(HLM_AGG)
         hlm_agg.update({col: sum for col in bin_cols})
-        hlm_agg.update({col: unique_set() for col in view_types_diff})
+        unique_agg = unique_sketch if self.approximate_unique else unique_codes
+        hlm_agg.update({col: unique_agg() for col in view_types_diff})
         hlm = (
-            traces.groupby(hlm_groupby)
+            traces.groupby(hlm_groupby, observed=True)
             .agg(hlm_agg, split_out=math.ceil(math.sqrt(traces.npartitions)))
             .persist()
             .repartition(partition_size=partition_size)
@@ -847,31 +1364,77 @@ class Analyzer(abc.ABC):
         hlm[bin_cols] = hlm[bin_cols].astype('uint32[pyarrow]')
         return hlm.persist()
 
-    def _compute_main_view(
+    def _merge_high_level_metrics(
+        self,
+        hlms: List[dd.DataFrame],
+        view_types: list,
+        partition_size: str,
+    ) -> dd.DataFrame:
+        hlm_groupby = list(set(view_types).union(HLM_EXTRA_COLS))
+        hlms = [hlm.map_partitions(reset_index_levels) for hlm in hlms]
+        # Build agg_dict
+        bin_cols = [col for col in hlms[0].columns if "_bin_" in col]
+        view_types_diff = list(set(VIEW_TYPES).difference(view_types))
+        unique_flatten_agg = unique_sketch_flatten if self.approximate_unique else unique_codes_flatten
+        hlm_agg = dict(HLM_AGG)
+        hlm_agg.update({col: sum for col in bin_cols})
+        hlm_agg.update({col: unique_flatten_agg() for col in view_types_diff})
+        hlm = dd.concat(hlms)
+        hlm = (
+            hlm.groupby(hlm_groupby, observed=True)
+            .agg(hlm_agg, split_out=math.ceil(math.sqrt(hlm.npartitions)))
+            .persist()
+            .repartition(partition_size=partition_size)
+            .replace(0, np.nan)
+        )
+        hlm[bin_cols] = hlm[bin_cols].astype('uint32[pyarrow]')
+        return hlm.persist()
+
+    def _compute_layered_main_view(
         self,
-        layer: Layer,
         hlm: dd.DataFrame,
         view_types: List[ViewType],
         partition_size: str,
     ) -> dd.DataFrame:
         # Set layer metrics
-        if "posix" not in layer.lower():
-            size_cols = [col for col in hlm.columns if col.startswith("size")]
-            hlm = hlm.drop(columns=size_cols)  # type: ignore
-            if "file_name" in hlm.columns:
-                hlm = hlm.drop(columns=["file_name"])  # type: ignore
-        hlm = hlm.map_partitions(self.set_layer_metrics, derived_metrics=self.derived_metrics[layer])
+        layered_hlm = hlm.map_partitions(
+            self.set_layers,
+            layers=self.layers,
+            derived_metrics=self.derived_metrics,
+            meta=self.set_layers(hlm._meta.copy(), layers=self.layers, derived_metrics=self.derived_metrics),
+        )
         # Build agg dict
         view_types_diff = set(VIEW_TYPES).difference(view_types)
+        unique_flatten_agg = unique_sketch_flatten if self.approximate_unique else unique_codes_flatten
         main_view_agg = {}
-        for col in hlm.columns:
+        for col in layered_hlm.columns:
+            if col == COL_LAYER:
+                continue
             if any(map(col.endswith, view_types_diff)):
-                main_view_agg[col] = unique_set_flatten()
+                main_view_agg[col] = unique_flatten_agg()
             elif col not in HLM_EXTRA_COLS:
                 main_view_agg[col] = sum
-        main_view = (
-            hlm.groupby(list(view_types))
+        return (
+            layered_hlm.groupby([COL_LAYER, *view_types], observed=True)
             .agg(main_view_agg, split_out=hlm.npartitions)
+            .persist()
+        )
+
+    def _select_main_view(self, layered_main_view: dd.DataFrame, hlm: dd.DataFrame, layer: Layer) -> dd.DataFrame:
+        layer_hlm = self.set_layers(
+            hlm._meta.copy(),
+            layers=self.layers,
+            derived_metrics=self.derived_metrics,
+            selected_layers=[layer],
+        )
+        layer_cols = [col for col in layered_main_view.columns if col in layer_hlm.columns]
+        main_view = (
+            layered_main_view.map_partitions(
+                self.select_layer,
+                layer=layer,
+                columns=layer_cols,
+                meta=self.select_layer(layered_main_view._meta, layer=layer, columns=layer_cols),
+            )
             .map_partitions(set_main_metrics)
             .replace(0, np.nan)
             .map_partitions(fix_dtypes)
@@ -893,13 +1456,15 @@ class Analyzer(abc.ABC):
         view_types_diff = set(VIEW_TYPES).difference(view_types)
         local_view_types = records.index._meta.names
         local_view_types_diff = set(local_view_types).difference([view_type])
+        unique_agg = unique_sketch if self.approximate_unique else unique_codes
+        unique_flatten_agg = unique_sketch_flatten if self.approximate_unique else unique_codes_flatten
 
         view_agg = {}
         for col in records.columns:
             if "_bin_" in col:
                 view_agg[col] = [sum]
             elif any(map(col.endswith, view_types_diff)):
-                view_agg[col] = [unique_set_flatten()]
+                view_agg[col] = [unique_flatten_agg()]
             else:
                 view_agg[col] = [
                     sum,
@@ -907,22 +1472,24 @@ class Analyzer(abc.ABC):
                     max,
                     "mean",
                     "std",
-                    quantile_stats(0.01, 0.99),
-                    quantile_stats(0.05, 0.95),
-                    quantile_stats(0.1, 0.9),
-                    quantile_stats(0.25, 0.75),
+                    quantile_stats(QUANTILE_STATS_RANGES, exact=self.exact_quantiles),
                 ]
-        view_agg.update({col: [unique_set()] for col in local_view_types_diff})
+        view_agg.update({col: [unique_agg()] for col in local_view_types_diff})
 
         view = (
             records.reset_index()
-            .groupby([view_type])
+            .groupby([view_type], observed=True)
             .agg(view_agg)
+            .map_partitions(set_quantile_stats, ranges=QUANTILE_STATS_RANGES)
             .replace(0, np.nan)
             .map_partitions(set_view_metrics, is_view_process_based=is_view_process_based)
         )
         view = flatten_column_names(view)
-        view = view.map_partitions(set_unique_counts, layer=layer).map_partitions(fix_dtypes).persist()
+        view = (
+            view.map_partitions(set_unique_counts, layer=layer, approximate=self.approximate_unique)
+            .map_partitions(fix_dtypes)
+            .persist()
+        )
 
         return view
 
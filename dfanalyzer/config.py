@@ -6,7 +6,7 @@ from hydra.conf import HelpConf, JobConf
 from omegaconf import MISSING
 from typing import Any, Dict, List, Optional
 
-from .constants import COL_TIME_RANGE, VIEW_TYPES
+from .constants import COL_TIME_RANGE, INDEX_PARALLELISM, STREAMING_CHUNK_SIZE, VIEW_TYPES
 from .types import ViewMetricBoundaries
 from .utils.env_utils import get_bool_env_var
 
@@ -190,9 +190,14 @@ class AnalyzerPresetConfigDLIO(AnalyzerPresetConfig):
 
 @dc.dataclass
 class AnalyzerConfig:
+    approximate_unique: Optional[bool] = False
+    categorical_strings: Optional[bool] = False
     checkpoint: Optional[bool] = True
     checkpoint_dir: Optional[str] = "${hydra:run.dir}/checkpoints"
+    exact_quantiles: Optional[bool] = False
+    incremental: Optional[bool] = False
     preset: Optional[AnalyzerPresetConfig] = MISSING
+    streaming: Optional[bool] = False
     time_approximate: Optional[bool] = True
     time_granularity: Optional[float] = MISSING
     time_resolution: Optional[float] = MISSING
@@ -209,8 +214,15 @@ class DarshanAnalyzerConfig(AnalyzerConfig):
 @dc.dataclass
 class DFTracerAnalyzerConfig(AnalyzerConfig):
     _target_: str = "dfanalyzer.dftracer.DFTracerAnalyzer"
+    index_dir: Optional[str] = None
+    index_parallelism: Optional[int] = INDEX_PARALLELISM
+    reader_engine: Optional[str] = "bag"
+    streaming_chunk_size: Optional[int] = STREAMING_CHUNK_SIZE
+    trace_cache_dir: Optional[str] = None
+    trace_manifest: Optional[str] = None
     time_granularity: Optional[float] = 1e6
     time_resolution: Optional[float] = 1e6
+    time_window: Optional[List[float]] = None
 
 
 @dc.dataclass
@@ -53,6 +53,8 @@ COL_FILE_PATTERN = 'file_pattern'
 COL_FUNC_NAME = 'func_name'
 COL_HOST_NAME = 'host_name'
 COL_IO_CAT = 'io_cat'
+COL_LAYER = 'layer'
+COL_LAYER_MASK = 'layer_mask'
 COL_NODE_NAME = 'node_name'
 COL_PROC_ID = 'proc_id'
 COL_PROC_NAME = 'proc_name'
@@ -174,6 +176,10 @@ POSIX_METADATA_FUNCTIONS = POSIX_IO_CAT_FUNCTIONS[IOCategory.METADATA]
 FILE_PATTERN_PLACEHOLDER = '[0-9]'
 PROC_NAME_SEPARATOR = '#'
 
+# Reader defaults shared by the analyzers and their configs
+INDEX_PARALLELISM = 16
+STREAMING_CHUNK_SIZE = 1024**3 * 16
+
 HUMANIZED_COLS = dict(
     acc_pat='Access Pattern',
     app_io_time='Application I/O Time',
@@ -0,0 +1,64 @@
+import dataclasses as dc
+import hydra
+from distributed import Client
+from hydra.utils import instantiate
+from omegaconf import MISSING
+from typing import Any, List, Optional
+
+from . import ClusterType
+from .cluster import ExternalCluster
+from .config import AnalyzerConfig, ClusterConfig, init_hydra_config_store
+from .dftracer import CONVERTED_ROW_GROUP_SIZE, DFTracerAnalyzer
+
+
+@dc.dataclass
+class ConvertConfig:
+    defaults: List[Any] = dc.field(
+        default_factory=lambda: [
+            {"analyzer": "dftracer"},
+            {"analyzer/preset": "posix"},
+            {"hydra/job": "custom"},
+            {"cluster": "local"},
+            "_self_",
+            {"override hydra/help": "custom"},
+            {"override hydra/job_logging": "custom"},
+        ]
+    )
+    analyzer: AnalyzerConfig = MISSING
+    cluster: ClusterConfig = MISSING
+    debug: Optional[bool] = False
+    output_dir: str = MISSING
+    row_group_size: Optional[int] = CONVERTED_ROW_GROUP_SIZE
+    trace_path: str = MISSING
+    verbose: Optional[bool] = False
+
+
+cs = init_hydra_config_store()
+cs.store(name="convert_config", node=ConvertConfig)
+
+
+@hydra.main(version_base=None, config_name="convert_config")
+def main(cfg: ConvertConfig) -> None:
+    cluster: ClusterType = instantiate(cfg.cluster)
+    if isinstance(cluster, ExternalCluster):
+        client = Client(cluster.scheduler_address)
+        if cluster.restart_on_connect:
+            client.restart()
+    else:
+        client = Client(cluster)
+    analyzer: DFTracerAnalyzer = instantiate(
+        cfg.analyzer,
+        debug=cfg.debug,
+        verbose=cfg.verbose,
+    )
+    analyzer.convert_trace(
+        trace_path=cfg.trace_path,
+        output_dir=cfg.output_dir,
+        row_group_size=cfg.row_group_size,
+    )
+    client.close()
+    cluster.close()  # type: ignore
+
+
+if __name__ == "__main__":
+    main()
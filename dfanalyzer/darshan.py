@@ -1,20 +1,261 @@
+import dask
+import dask.bag as db
 import dask.dataframe as dd
 import darshan as d
 import glob
 import numpy as np
 import os
 import pandas as pd
+from typing import List, Tuple
 
 from .analyzer import Analyzer
 from .constants import COL_TIME_END, COL_TIME_START, IOCategory
 from .types import RawStats
 
+DXT_DTYPES = {
+    'file_name': 'object',
+    'proc_name': 'object',
+    'size': 'int64',
+    'end_time': 'float64',
+    'start_time': 'float64',
+    'func_name': 'object',
+    'host_name': 'object',
+    'io_cat': 'int64',
+    'time_range': 'int64',
+    'cat': 'object',
+    'acc_pat': 'int64',
+    'count': 'int64',
+    'time': 'float64',
+}
+DXT_SEGMENT_COLS = ['length', 'start_time', 'end_time']
+DXT_SEGMENT_OPS = [
+    ('read_segments', 'read', IOCategory.READ.value),
+    ('write_segments', 'write', IOCategory.WRITE.value),
+]
+COUNTER_MODULES = ['POSIX', 'STDIO']
+DXT_MODULES = ['DXT_POSIX']
+READ_TIME_COUNTERS = ['POSIX_F_READ_TIME', 'STDIO_F_READ_TIME']
+WRITE_TIME_COUNTERS = ['POSIX_F_WRITE_TIME', 'STDIO_F_WRITE_TIME']
+METADATA_TIME_COUNTERS = ['POSIX_F_META_TIME', 'STDIO_F_META_TIME']
+READ_COUNTERS = ['POSIX_READS', 'STDIO_READS']
+WRITE_COUNTERS = ['POSIX_WRITES', 'STDIO_WRITES']
+OPEN_COUNTERS = ['POSIX_OPENS', 'STDIO_OPENS']
+SEEK_COUNTERS = ['POSIX_SEEKS', 'STDIO_SEEKS']
+METADATA_COUNTERS = [
+    'POSIX_OPENS',
+    'POSIX_FILENOS',
+    'POSIX_DUPS',
+    'POSIX_SEEKS',
+    'POSIX_STATS',
+    'POSIX_FSYNCS',
+    'POSIX_FDSYNCS',
+    'STDIO_OPENS',
+    'STDIO_FDOPENS',
+    'STDIO_SEEKS',
+    'STDIO_FLUSHES',
+]
+READ_SIZE_COUNTERS = ['POSIX_BYTES_READ', 'STDIO_BYTES_READ']
+WRITE_SIZE_COUNTERS = ['POSIX_BYTES_WRITTEN', 'STDIO_BYTES_WRITTEN']
+SEQUENTIAL_COUNTERS = ['POSIX_SEQ_READS', 'POSIX_SEQ_WRITES']
+# Derived file_name view metric -> (aggregation over its counters, counters), in view column order.
+# Counters missing from a log count as zero, metrics without counters are NaN.
+FILE_NAME_VIEW_METRICS = {
+    'time': ('sum', READ_TIME_COUNTERS + WRITE_TIME_COUNTERS + METADATA_TIME_COUNTERS),
+    'read_time': ('sum', READ_TIME_COUNTERS),
+    'write_time': ('sum', WRITE_TIME_COUNTERS),
+    'metadata_time': ('sum', METADATA_TIME_COUNTERS),
+    'data_time': ('sum', READ_TIME_COUNTERS + WRITE_TIME_COUNTERS),
+    'close_time': (None, []),
+    'open_time': (None, []),
+    'seek_time': (None, []),
+    'stat_time': (None, []),
+    'count': ('sum', METADATA_COUNTERS + READ_COUNTERS + WRITE_COUNTERS),
+    'read_count': ('sum', READ_COUNTERS),
+    'write_count': ('sum', WRITE_COUNTERS),
+    'data_count': ('sum', READ_COUNTERS + WRITE_COUNTERS),
+    'metadata_count': ('sum', METADATA_COUNTERS),
+    'close_count': (None, []),
+    'open_count': ('sum', OPEN_COUNTERS),
+    'seek_count': ('sum', SEEK_COUNTERS),
+    'stat_count': ('sum', ['POSIX_STATS']),
+    'size_min': (None, []),
+    'size_max': ('max', ['POSIX_MAX_BYTE_READ', 'POSIX_MAX_BYTE_WRITTEN']),
+    'read_min': (None, []),
+    'read_max': ('max', ['POSIX_MAX_BYTE_READ', 'STDIO_MAX_BYTE_READ']),
+    'write_min': (None, []),
+    'write_max': ('max', ['POSIX_MAX_BYTE_WRITTEN', 'STDIO_MAX_BYTE_WRITTEN']),
+    'size': ('sum', READ_SIZE_COUNTERS + WRITE_SIZE_COUNTERS),
+    'read_size': ('sum', READ_SIZE_COUNTERS),
+    'write_size': ('sum', WRITE_SIZE_COUNTERS),
+    'data_size': ('sum', READ_SIZE_COUNTERS + WRITE_SIZE_COUNTERS),
+    'sequential_time': (None, []),
+    'sequential_count': ('sum', SEQUENTIAL_COUNTERS),
+    'sequential_size': (None, []),
+    'random_time': (None, []),
+    'random_count': (None, []),  # count - sequential_count
+    'random_size': (None, []),
+}
+FILE_NAME_VIEW_COUNTERS = sorted({counter for _, counters in FILE_NAME_VIEW_METRICS.values() for counter in counters})
 TRACE_COL_MAPPING = {
     'end_time': COL_TIME_END,
     'start_time': COL_TIME_START,
 }
 
 
+def list_darshan_logs(trace_path: str) -> List[str]:
+    if os.path.isdir(trace_path):
+        return sorted(glob.glob(os.path.join(trace_path, '*.darshan')))
+    return [trace_path]
+
+
+def read_log_summary(trace_file: str) -> Tuple[float, bool]:
+    # Only the header is needed, module records are not read
+    report = d.DarshanReport(trace_file, read_all=False)
+    return calculate_job_time(report), 'DXT_POSIX' in report.modules
+
+
+def read_report(trace_file: str, modules: List[str]) -> d.DarshanReport:
+    # Decode only the records of the given modules instead of every module in the log
+    report = d.DarshanReport(trace_file, read_all=False)
+    for mod in modules:
+        if mod not in report.modules:
+            continue
+        if mod.startswith('DXT_'):
+            report.mod_read_all_dxt_records(mod)
+        else:
+            report.mod_read_all_records(mod)
+    return report
+
+
+def read_dxt_dataframe(trace_file: str, time_granularity: int) -> pd.DataFrame:
+    report = read_report(trace_file, DXT_MODULES)
+    return create_dxt_dataframe(report, time_granularity)
+
+
+def read_file_name_view(trace_file: str) -> pd.DataFrame:
+    report = read_report(trace_file, COUNTER_MODULES)
+    return create_file_name_view(report)
+
+
+def create_empty_dxt_dataframe() -> pd.DataFrame:
+    empty_df = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in DXT_DTYPES.items()})
+    return empty_df.rename(columns=TRACE_COL_MAPPING)
+
+
+def calculate_job_time(report: d.DarshanReport) -> float:
+    job = report.metadata['job']
+    if 'start_time' in job:
+        job_time = job['end_time'] - job['start_time']
+    else:
+        job_time = job['end_time_sec'] - job['start_time_sec']
+    return job_time
+
+
+def create_dxt_dataframe(report: d.DarshanReport, time_granularity: int) -> pd.DataFrame:
+    # Get the DXT_POSIX records, releasing them from the report once converted
+    dxt_df = pd.DataFrame(report.records.pop('DXT_POSIX').to_df())
+    # Stack the segments of all records per operation, keeping the record each segment belongs to
+    segment_dfs = []
+    for op_index, (segments_col, func_name, io_cat) in enumerate(DXT_SEGMENT_OPS):
+        segments = [record_segments for record_segments in dxt_df[segments_col] if len(record_segments) > 0]
+        if len(segments) == 0:
+            continue
+        num_segments = dxt_df[segments_col].map(len).to_numpy()
+        segment_df = pd.concat([record_segments[DXT_SEGMENT_COLS] for record_segments in segments])
+        segment_dfs.append(
+            pd.DataFrame(
+                {
+                    'record': np.repeat(np.arange(len(dxt_df)), num_segments),
+                    'op': op_index,
+                    'size': segment_df['length'].to_numpy(),
+                    'end_time': segment_df['end_time'].to_numpy(),
+                    'start_time': segment_df['start_time'].to_numpy(),
+                    'func_name': func_name,
+                    'io_cat': io_cat,
+                }
+            )
+        )
+    if len(segment_dfs) == 0:
+        return create_empty_dxt_dataframe()
+    # Order the segments by record, reads before writes, like the records are traversed
+    segment_df = pd.concat(segment_dfs, ignore_index=True).sort_values(['record', 'op'], kind='stable')
+    record = segment_df['record'].to_numpy()
+    file_names = dxt_df['id'].map(report.data['name_records']).to_numpy()
+    proc_names = ('app#localhost#' + dxt_df['rank'].astype(str) + '#0').to_numpy()
+    start_times = segment_df['start_time'].to_numpy()
+    end_times = segment_df['end_time'].to_numpy()
+    dxt_segments_df = pd.DataFrame(
+        {
+            'file_name': file_names[record],
+            'proc_name': proc_names[record],
+            'size': segment_df['size'].to_numpy(),
+            'end_time': end_times,
+            'start_time': start_times,
+            'func_name': segment_df['func_name'].to_numpy(),
+            'host_name': dxt_df['hostname'].to_numpy()[record],
+            'io_cat': segment_df['io_cat'].to_numpy(),
+            'time_range': (start_times * time_granularity).astype(np.int64),
+            'cat': 'posix',
+            'acc_pat': 0,  # Would need more logic for random access patterns
+            'count': 1,
+            'time': end_times - start_times,
+        },
+        columns=list(DXT_DTYPES),
+    )
+    return dxt_segments_df.rename(columns=TRACE_COL_MAPPING)
+
+
+def create_file_name_view(report: d.DarshanReport) -> pd.DataFrame:
+    # Join the counters and fcounters of all modules once on their shared (rank, id) index
+    counter_dfs = []
+    for mod in COUNTER_MODULES:
+        if mod in report.records:
+            mod_df = report.records.pop(mod).to_df()
+            counter_dfs.extend(mod_df[kind].set_index(['rank', 'id']) for kind in ['counters', 'fcounters'])
+    if len(counter_dfs) == 0:
+        counter_df = pd.DataFrame(index=pd.MultiIndex.from_arrays([[], []], names=['rank', 'id']))
+    else:
+        counter_df = pd.concat(counter_dfs, axis=1, join='outer')
+    # Skip the records without a file name and Darshan's pseudo files such as <STDOUT>
+    file_names = pd.Series(
+        counter_df.index.get_level_values('id').map(report.name_records),
+        index=counter_df.index,
+        dtype=object,
+    )
+    names = file_names.fillna('')
+    is_file = file_names.notna() & ~(names.str.startswith('<') & names.str.endswith('>'))
+    counter_df = counter_df[is_file.to_numpy()]
+    counter_block = counter_df.reindex(columns=FILE_NAME_VIEW_COUNTERS).fillna(0).to_numpy(dtype=np.float64)
+    counter_index = {counter: i for i, counter in enumerate(FILE_NAME_VIEW_COUNTERS)}
+    # Every summed metric is a column of a 0/1 weight matrix, so all sums are one matrix product
+    sum_metrics = [metric for metric, (agg, _) in FILE_NAME_VIEW_METRICS.items() if agg == 'sum']
+    sum_weights = np.zeros((len(FILE_NAME_VIEW_COUNTERS), len(sum_metrics)))
+    for i, metric in enumerate(sum_metrics):
+        sum_weights[[counter_index[counter] for counter in FILE_NAME_VIEW_METRICS[metric][1]], i] = 1
+    sums = dict(zip(sum_metrics, (counter_block @ sum_weights).T))
+    file_name_view = pd.DataFrame(
+        {
+            'file_name': file_names[is_file].to_numpy(),
+            'proc_name': ('app#localhost#' + counter_df.index.get_level_values('rank').astype(str) + '#0').to_numpy(),
+        }
+    )
+    for metric, (agg, counters) in FILE_NAME_VIEW_METRICS.items():
+        if agg == 'sum':
+            file_name_view[metric] = sums[metric]
+        elif agg == 'max':
+            file_name_view[metric] = counter_block[:, [counter_index[counter] for counter in counters]].max(axis=1)
+        else:
+            file_name_view[metric] = np.nan
+    file_name_view['random_count'] = file_name_view['count'] - file_name_view['sequential_count']
+    count_cols = [col for col in file_name_view.columns if col.endswith('_count')]
+    size_cols = [col for col in file_name_view.columns if col.endswith('_size')]
+    time_cols = [col for col in file_name_view.columns if col.endswith('_time')]
+    file_name_view[count_cols] = file_name_view[count_cols].astype('Int64')
+    file_name_view[size_cols] = file_name_view[size_cols].astype('Int64')
+    file_name_view[time_cols] = file_name_view[time_cols].astype('Float64')
+    return file_name_view
+
+
 class DarshanAnalyzer(Analyzer):
     job_time: float = 0.0
 
@@ -35,32 +276,29 @@ class DarshanAnalyzer(Analyzer):
         if not trace_path.endswith('.darshan') and not os.path.isdir(trace_path):
             raise ValueError(f"Invalid trace path: {trace_path}. Must be a directory or a .darshan file.")
 
-        reports = []
-        if os.path.isdir(trace_path):
-            trace_path = os.path.join(trace_path, '*.darshan')
-            trace_paths = glob.glob(trace_path)
-            for trace_path in trace_paths:
-                report = d.DarshanReport(trace_path, read_all=True)
-                reports.append(report)
-        else:
-            report = d.DarshanReport(trace_path, read_all=True)
-            reports.append(report)
+        trace_files = list_darshan_logs(trace_path)
+        if len(trace_files) == 0:
+            raise ValueError(f"No Darshan logs found in: {trace_path}")
 
-        self.reports = reports
-        self.job_time = max(map(self._calculate_job_time, reports))
+        # Reduce the job time and the DXT availability of all logs on the cluster
+        log_summaries = db.from_sequence(trace_files, npartitions=len(trace_files)).map(read_log_summary)
+        job_time, has_dxt = dask.compute(log_summaries.pluck(0).max(), log_summaries.pluck(1).all())
+        self.job_time = float(job_time)
 
-        if all('DXT_POSIX' in report.records for report in reports):
+        if has_dxt:
             # Let the analyzer do read_trace etc as normal
             return super().analyze_trace(
-                trace_path,
-                view_types,
-                exclude_characteristics,
-                logical_view_types,
-                metric_boundaries,
-                percentile,
-                threshold,
-                time_view_type,
-                unoverlapped_posix_only,
+                trace_path=trace_path,
+                view_types=view_types,
+                exclude_characteristics=exclude_characteristics,
+                extra_columns=extra_columns,
+                extra_columns_fn=extra_columns_fn,
+                logical_view_types=logical_view_types,
+                metric_boundaries=metric_boundaries,
+                percentile=percentile,
+                threshold=threshold,
+                time_view_type=time_view_type,
+                unoverlapped_posix_only=unoverlapped_posix_only,
             )
 
         if any(view_type not in ['file_name', 'proc_name'] for view_type in view_types):
@@ -68,9 +306,8 @@ class DarshanAnalyzer(Analyzer):
 
         is_slope_based = threshold is not None
 
-        file_name_df = pd.concat(map(self._create_file_name_view, reports), ignore_index=True)
         file_name_ddf = (
-            dd.from_pandas(file_name_df, npartitions=len(reports))
+            dd.from_map(read_file_name_view, trace_files)
             .persist()
             .repartition(partition_size='256MB')
             .persist()
@@ -96,246 +333,14 @@ class DarshanAnalyzer(Analyzer):
             exclude_characteristics=exclude_characteristics,
         )
 
-    def read_trace(self, trace_path, extra_columns, extra_columns_fn):
-        df = pd.concat(map(self._create_dxt_dataframe, self.reports), ignore_index=True)
-        return dd.from_pandas(df, npartitions=len(self.reports))
+    def read_trace(self, trace_path, extra_columns, extra_columns_fn, needed_columns=None):
+        # Each log is parsed on a worker into its own partition
+        return dd.from_map(
+            read_dxt_dataframe,
+            list_darshan_logs(trace_path),
+            time_granularity=self.time_granularity,
+            meta=create_empty_dxt_dataframe(),
+        )
 
     def compute_job_time(self, traces: dd.DataFrame) -> float:
         return self.job_time
-
-    def _calculate_job_time(self, report: d.DarshanReport) -> float:
-        job = report.metadata['job']
-        if 'start_time' in job:
-            job_time = job['end_time'] - job['start_time']
-        else:
-            job_time = job['end_time_sec'] - job['start_time_sec']
-        return job_time
-
-    def _create_dxt_dataframe(self, report: d.DarshanReport) -> pd.DataFrame:
-        # Get the DXT_POSIX records
-        dxt_df = pd.DataFrame(report.records['DXT_POSIX'].to_df())
-        # Initialize data structures
-        dxt_rows = []
-        # Process each record
-        for _, record in dxt_df.iterrows():
-            file_id = record['id']
-            rank = record['rank']
-            host_name = record['hostname']
-            file_name = report.data['name_records'][file_id]
-            proc_name = f"app#localhost#{rank}#0"
-
-            # Process read segments
-            if not record['read_segments'].empty:
-                read_segments = record['read_segments']
-
-                # Convert dataframe to dict of lists for faster processing
-                lengths = read_segments['length'].tolist()
-                start_times = read_segments['start_time'].tolist()
-                end_times = read_segments['end_time'].tolist()
-                offsets = read_segments['offset'].tolist()
-
-                # Create a batch of rows
-                for i in range(len(lengths)):
-                    dxt_rows.append(
-                        {
-                            'file_name': file_name,
-                            'proc_name': proc_name,
-                            'size': lengths[i],
-                            'end_time': end_times[i],
-                            'start_time': start_times[i],
-                            'func_name': 'read',
-                            'host_name': host_name,
-                            'io_cat': IOCategory.READ.value,
-                            'time_range': int(start_times[i] * self.time_granularity),
-                            'cat': 'posix',
-                            'acc_pat': 0,  # Would need more logic for random access patterns
-                            'count': 1,
-                            'time': end_times[i] - start_times[i],
-                        }
-                    )
-
-            # Process write segments
-            if not record['write_segments'].empty:
-                write_segments = record['write_segments']
-
-                # Convert dataframe to dict of lists for faster processing
-                lengths = write_segments['length'].tolist()
-                start_times = write_segments['start_time'].tolist()
-                end_times = write_segments['end_time'].tolist()
-                offsets = write_segments['offset'].tolist()
-
-                # Create a batch of rows
-                for i in range(len(lengths)):
-                    dxt_rows.append(
-                        {
-                            'file_name': file_name,
-                            'proc_name': proc_name,
-                            'size': lengths[i],
-                            'end_time': end_times[i],
-                            'start_time': start_times[i],
-                            'func_name': 'write',
-                            'host_name': host_name,
-                            'io_cat': IOCategory.WRITE.value,
-                            'time_range': int(start_times[i] * self.time_granularity),
-                            'cat': 'posix',
-                            'acc_pat': 0,  # Would need more logic for random access patterns
-                            'count': 1,
-                            'time': end_times[i] - start_times[i],
-                        }
-                    )
-
-        # Create the final dataframe in one go
-        return pd.DataFrame(dxt_rows).rename(columns=TRACE_COL_MAPPING)
-
-    def _create_file_name_view(self, report: d.DarshanReport) -> pd.DataFrame:
-        posix_df = report.records['POSIX'].to_df()
-        file_name_df = pd.DataFrame.from_dict(report.name_records, orient='index', columns=['file_name'])
-        file_name_view = (
-            posix_df['counters']
-            .set_index(['rank', 'id'])
-            .merge(
-                posix_df['fcounters'].set_index(['rank', 'id']),
-                left_index=True,
-                right_index=True,
-            )
-        )
-        if 'STDIO' in report.records:
-            stdio_df = report.records['STDIO'].to_df()
-            file_name_view = file_name_view.merge(
-                stdio_df['counters'].set_index(['rank', 'id']),
-                left_index=True,
-                right_index=True,
-                how='outer',
-            ).merge(
-                stdio_df['fcounters'].set_index(['rank', 'id']),
-                left_index=True,
-                right_index=True,
-                how='outer',
-            )
-        file_name_view = (
-            file_name_view.merge(
-                file_name_df,
-                left_on='id',
-                right_index=True,
-            )
-            .reset_index()
-            .assign(proc_name=lambda x: 'app#localhost#' + x['rank'].astype(str) + '#0')
-            # .set_index(['proc_name', 'file_name'])
-            .drop(columns=['id', 'rank'])
-            .query('~(file_name.str.startswith("<") and file_name.str.endswith(">"))')
-        )
-        file_name_view['time'] = (
-            file_name_view['POSIX_F_READ_TIME'].fillna(0)
-            + file_name_view['POSIX_F_WRITE_TIME'].fillna(0)
-            + file_name_view['POSIX_F_META_TIME'].fillna(0)
-            + file_name_view['STDIO_F_READ_TIME'].fillna(0)
-            + file_name_view['STDIO_F_WRITE_TIME'].fillna(0)
-            + file_name_view['STDIO_F_META_TIME'].fillna(0)
-        )
-        file_name_view['read_time'] = file_name_view['POSIX_F_READ_TIME'].fillna(0) + file_name_view[
-            'STDIO_F_READ_TIME'
-        ].fillna(0)
-        file_name_view['write_time'] = file_name_view['POSIX_F_WRITE_TIME'].fillna(0) + file_name_view[
-            'STDIO_F_WRITE_TIME'
-        ].fillna(0)
-        file_name_view['metadata_time'] = file_name_view['POSIX_F_META_TIME'].fillna(0) + file_name_view[
-            'STDIO_F_META_TIME'
-        ].fillna(0)
-        file_name_view['data_time'] = file_name_view['read_time'] + file_name_view['write_time']
-        file_name_view['close_time'] = np.nan
-        file_name_view['open_time'] = np.nan
-        file_name_view['seek_time'] = np.nan
-        file_name_view['stat_time'] = np.nan
-        file_name_view['count'] = (
-            file_name_view['POSIX_OPENS'].fillna(0)
-            + file_name_view['POSIX_FILENOS'].fillna(0)
-            + file_name_view['POSIX_DUPS'].fillna(0)
-            + file_name_view['POSIX_READS'].fillna(0)
-            + file_name_view['POSIX_WRITES'].fillna(0)
-            + file_name_view['POSIX_SEEKS'].fillna(0)
-            + file_name_view['POSIX_STATS'].fillna(0)
-            # + file_name_view['POSIX_MMAPS'].fillna(0)
-            + file_name_view['POSIX_FSYNCS'].fillna(0)
-            + file_name_view['POSIX_FDSYNCS'].fillna(0)
-            + file_name_view['STDIO_OPENS'].fillna(0)
-            + file_name_view['STDIO_FDOPENS'].fillna(0)
-            + file_name_view['STDIO_READS'].fillna(0)
-            + file_name_view['STDIO_WRITES'].fillna(0)
-            + file_name_view['STDIO_SEEKS'].fillna(0)
-            + file_name_view['STDIO_FLUSHES'].fillna(0)
-        )
-        file_name_view['read_count'] = file_name_view['POSIX_READS'].fillna(0) + file_name_view['STDIO_READS'].fillna(
-            0
-        )
-        file_name_view['write_count'] = file_name_view['POSIX_WRITES'].fillna(0) + file_name_view[
-            'STDIO_WRITES'
-        ].fillna(0)
-        file_name_view['data_count'] = file_name_view['read_count'] + file_name_view['write_count']
-        file_name_view['metadata_count'] = (
-            file_name_view['POSIX_OPENS'].fillna(0)
-            + file_name_view['POSIX_FILENOS'].fillna(0)
-            + file_name_view['POSIX_DUPS'].fillna(0)
-            + file_name_view['POSIX_SEEKS'].fillna(0)
-            + file_name_view['POSIX_STATS'].fillna(0)
-            # + file_name_view['POSIX_MMAPS'].fillna(0)
-            + file_name_view['POSIX_FSYNCS'].fillna(0)
-            + file_name_view['POSIX_FDSYNCS'].fillna(0)
-            + file_name_view['STDIO_OPENS'].fillna(0)
-            + file_name_view['STDIO_FDOPENS'].fillna(0)
-            + file_name_view['STDIO_SEEKS'].fillna(0)
-            + file_name_view['STDIO_FLUSHES'].fillna(0)
-        )
-        file_name_view['close_count'] = np.nan
-        file_name_view['open_count'] = file_name_view['POSIX_OPENS'].fillna(0) + file_name_view['STDIO_OPENS'].fillna(
-            0
-        )
-        file_name_view['seek_count'] = file_name_view['POSIX_SEEKS'].fillna(0) + file_name_view['STDIO_SEEKS'].fillna(
-            0
-        )
-        file_name_view['stat_count'] = (file_name_view['POSIX_STATS'].fillna(0)).astype(int)
-        file_name_view['size_min'] = np.nan
-        file_name_view['size_max'] = np.maximum(
-            file_name_view['POSIX_MAX_BYTE_READ'].fillna(0),
-            file_name_view['POSIX_MAX_BYTE_WRITTEN'].fillna(0),
-        )
-        file_name_view['read_min'] = np.nan
-        file_name_view['read_max'] = np.maximum(
-            file_name_view['POSIX_MAX_BYTE_READ'].fillna(0),
-            file_name_view['STDIO_MAX_BYTE_READ'].fillna(0),
-        )
-        file_name_view['write_min'] = np.nan
-        file_name_view['write_max'] = np.maximum(
-            file_name_view['POSIX_MAX_BYTE_WRITTEN'].fillna(0),
-            file_name_view['STDIO_MAX_BYTE_WRITTEN'].fillna(0),
-        )
-        file_name_view['size'] = (
-            file_name_view['POSIX_BYTES_READ'].fillna(0)
-            + file_name_view['POSIX_BYTES_WRITTEN'].fillna(0)
-            + file_name_view['STDIO_BYTES_READ'].fillna(0)
-            + file_name_view['STDIO_BYTES_WRITTEN'].fillna(0)
-        )
-        file_name_view['read_size'] = file_name_view['POSIX_BYTES_READ'].fillna(0) + file_name_view[
-            'STDIO_BYTES_READ'
-        ].fillna(0)
-        file_name_view['write_size'] = file_name_view['POSIX_BYTES_WRITTEN'].fillna(0) + file_name_view[
-            'STDIO_BYTES_WRITTEN'
-        ].fillna(0)
-        file_name_view['data_size'] = file_name_view['read_size'] + file_name_view['write_size']
-        file_name_view['sequential_time'] = np.nan
-        file_name_view['sequential_count'] = file_name_view['POSIX_SEQ_READS'].fillna(0) + file_name_view[
-            'POSIX_SEQ_WRITES'
-        ].fillna(0)
-        file_name_view['sequential_size'] = np.nan
-        file_name_view['random_time'] = np.nan
-        file_name_view['random_count'] = file_name_view['count'] - file_name_view['sequential_count']
-        file_name_view['random_size'] = np.nan
-        posix_cols = [col for col in file_name_view.columns if col.startswith('POSIX_')]
-        stdio_cols = [col for col in file_name_view.columns if col.startswith('STDIO_')]
-        file_name_view = file_name_view.drop(columns=posix_cols + stdio_cols)
-        count_cols = [col for col in file_name_view.columns if col.endswith('_count')]
-        size_cols = [col for col in file_name_view.columns if col.endswith('_size')]
-        time_cols = [col for col in file_name_view.columns if col.endswith('_time')]
-        file_name_view[count_cols] = file_name_view[count_cols].astype('Int64')
-        file_name_view[size_cols] = file_name_view[size_cols].astype('Int64')
-        file_name_view[time_cols] = file_name_view[time_cols].astype('Float64')
-        return file_name_view
@@ -1,6 +1,8 @@
 import dask
 import dask.bag as db
 import dask.dataframe as dd
+import functools
+import hashlib
 import json
 import logging
 import math
@@ -8,11 +10,16 @@ import numpy as np
 import os
 import pandas as pd
 import portion as I
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import re
 import sys
 import zindex_py as zindex
+from dask import compute, persist
 from dask.distributed import wait
 from glob import glob
-from typing import Callable, Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from .analyzer import Analyzer
 from .constants import (
@@ -28,16 +35,45 @@ from .constants import (
     COL_TIME_END,
     COL_TIME_RANGE,
     COL_TIME_START,
+    INDEX_PARALLELISM,
     POSIX_IO_CAT_MAPPING,
     POSIX_METADATA_FUNCTIONS,
+    STREAMING_CHUNK_SIZE,
     IOCategory,
     Layer,
 )
 from .types import ViewType
+from .utils.file_utils import ensure_dir
 
+try:
+    import orjson
+except ModuleNotFoundError:
+    orjson = None
 
+
+BATCH_COLUMNS = {
+    "name": pa.string(),
+    "cat": pa.string(),
+    "type": pa.uint8(),
+    "pid": pa.int64(),
+    "tid": pa.int64(),
+    "ts": pa.int64(),
+    "dur": pa.int64(),
+    "hhash": pa.string(),
+    "fhash": pa.string(),
+    "hash": pa.string(),
+    "value": pa.string(),
+    "image_id": pa.int64(),
+    "io_cat": pa.uint8(),
+    "size": pa.int64(),
+    "func_ignored": pa.bool_(),
+}
 CAT_POSIX = "POSIX"
 CAT_STDIO = "STDIO"
+CONVERTED_GLOBAL_FILE = "global.json"
+# Columns with row group statistics in converted traces, used to prune row groups when reading
+CONVERTED_STATISTICS_COLUMNS = ["ts", "pid", "file_name"]
+CONVERTED_ROW_GROUP_SIZE = 1024**2
 COND_CHECKPOINT = {
     "cat": {"checkpoint"},
     "name": {"TFCheckpointing.checkpoint"},
@@ -53,6 +89,13 @@ COND_READ = {
         "TorchDataset.__getitem__",
     },
 }
+# Posix and stdio events get these category suffixes when their file name contains the pattern
+FILE_CAT_SUFFIXES = {
+    "/checkpoint": "_checkpoint",
+    "/data": "_reader",
+    "/lustre": "_lustre",
+    "/ssd": "_ssd",
+}
 IGNORED_FILE_PATTERNS = [
     "/dev/",
     "/etc/",
@@ -116,6 +159,25 @@ IGNORED_FUNC_PATTERNS = [
     'checkpoint_end_',
     'checkpoint_start_',
 ]
+# All file patterns are matched in a single scan of each distinct file name
+FILE_PATTERN_REGEX = re.compile("|".join([*IGNORED_FILE_PATTERNS, *FILE_CAT_SUFFIXES]))
+IGNORED_FUNC_NAME_SET = frozenset(IGNORED_FUNC_NAMES)
+IGNORED_FUNC_PATTERN_REGEX = re.compile("|".join(IGNORED_FUNC_PATTERNS))
+DEFAULT_LINE_SIZE = 256
+LINE_SAMPLE_SIZE = 1024
+METADATA_TYPES = {
+    "FH": 1,  # 1-> file hash
+    "HH": 2,  # 2-> hostname hash
+    "SH": 3,  # 3-> string hash
+    "PR": 5,  # 5-> process metadata
+}
+PARTITION_SIZE = 1024**2 * 128
+PFW_BATCH_SIZE = 1024**2 * 4
+# Event columns that are only loaded when the analysis needs them
+PROJECTED_COLUMNS = ["image_id", "level", "tinterval", "type"]
+READER_ENGINE_BAG = "bag"
+READER_ENGINE_PARTITIONED = "partitioned"
+READER_ENGINES = [READER_ENGINE_BAG, READER_ENGINE_PARTITIONED]
 TRACE_COL_MAPPING = {
     'dur': COL_TIME,
     'name': COL_FUNC_NAME,
@@ -123,34 +185,99 @@ TRACE_COL_MAPPING = {
     'trange': COL_TIME_RANGE,
     'ts': COL_TIME_START,
 }
+TRACE_MANIFEST_COLUMNS = {
+    "path": pa.string(),
+    "size": pa.int64(),
+    "mtime_ns": pa.int64(),
+    "line_count": pa.int64(),
+    "line_size": pa.float64(),
+}
+ZINDEX_MANIFEST = "zindex_manifest.json"
+
 
+def classify_file_names(file_names: pd.Series) -> pd.DataFrame:
+    """Classifies each distinct file name against the file patterns.
 
-def create_index(filename):
-    index_file = f"{filename}.zindex"
+    Every name is scanned once for all of `IGNORED_FILE_PATTERNS` and
+    `FILE_CAT_SUFFIXES`, and the flags are broadcast back to the index of
+    `file_names` (the file hashes).
+
+    Returns:
+        A dataframe with an `ignored` flag and the `cat_suffix` of each file.
+    """
+    classes = {}
+    for file_name in file_names.dropna().unique():
+        matches = set(FILE_PATTERN_REGEX.findall(file_name))
+        classes[file_name] = (
+            any(pattern in matches for pattern in IGNORED_FILE_PATTERNS),
+            "".join(suffix for pattern, suffix in FILE_CAT_SUFFIXES.items() if pattern in matches),
+        )
+    file_names = file_names.astype(object)
+    return pd.DataFrame(
+        {
+            "ignored": file_names.map(lambda name: classes.get(name, (False, ""))[0]).astype(bool),
+            "cat_suffix": file_names.map(lambda name: classes.get(name, (False, ""))[1]).astype("string[pyarrow]"),
+        },
+        index=file_names.index,
+    )
+
+
+def create_index(filename, index_file):
+    if os.path.exists(index_file) and os.path.getmtime(index_file) < os.path.getmtime(filename):
+        logging.debug(f"Removing stale index {index_file} of {filename}")
+        os.remove(index_file)
     if not os.path.exists(index_file):
+        # Build under a temporary name so that an interrupted build is never taken for a complete index
+        tmp_index_file = f"{index_file}.{os.getpid()}.tmp"
         status = zindex.create_index(
             filename,
-            index_file=f"file:{index_file}",
+            index_file=f"file:{tmp_index_file}",
             regex="id:\b([0-9]+)",
             numeric=True,
             unique=True,
             debug=False,
             verbose=False,
         )
+        os.replace(tmp_index_file, index_file)
         logging.debug(f"Creating Index for {filename} returned {status}")
-    return filename
+    _, line_number = get_linenumber(filename, index_file)
+    return (filename, line_number, sample_line_size(filename, line_number, index_file))
 
 
-def generate_line_batches(filename, max_line):
-    batch_size = 1024 * 16
+def generate_byte_batches(filename, size):
+    batch_size = PFW_BATCH_SIZE
+    for start in range(0, size, batch_size):
+        end = min((start + batch_size - 1), (size - 1))
+        logging.debug(f"Created a batch for {filename} from [{start}, {end}] bytes")
+        yield filename, start, end
+
+
+def generate_line_batches(filename, max_line, line_size=DEFAULT_LINE_SIZE):
+    # Batches hold about as many decompressed bytes as the byte batches of .pfw files
+    batch_size = max(1, int(PFW_BATCH_SIZE // line_size))
     for start in range(0, max_line, batch_size):
         end = min((start + batch_size - 1), (max_line - 1))
         logging.debug(f"Created a batch for {filename} from [{start}, {end}] lines")
         yield filename, start, end
 
 
-def get_linenumber(filename):
-    index_file = f"{filename}.zindex"
+def get_index_file(filename, index_dir=None, index_key=None):
+    if index_dir is None:
+        return f"{filename}.zindex"
+    key = hashlib.md5((index_key or get_index_key(filename)).encode("utf-8")).hexdigest()
+    return f"{index_dir}/{os.path.basename(filename)}.{key}.zindex"
+
+
+def get_index_key(filename):
+    stat = os.stat(filename)
+    return f"{os.path.abspath(filename)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_index_manifest_path(filename, index_dir=None):
+    return f"{index_dir or os.path.dirname(os.path.abspath(filename))}/{ZINDEX_MANIFEST}"
+
+
+def get_linenumber(filename, index_file):
     line_number = zindex.get_max_line(
         filename,
         index_file=index_file,
@@ -161,18 +288,13 @@ def get_linenumber(filename):
     return (filename, line_number)
 
 
-def get_size(filename):
+def get_size(filename, line_number=None, line_size=DEFAULT_LINE_SIZE, index_dir=None):
     if filename.endswith(".pfw"):
         size = os.stat(filename).st_size
     elif filename.endswith(".pfw.gz"):
-        index_file = f"{filename}.zindex"
-        line_number = zindex.get_max_line(
-            filename,
-            index_file=index_file,
-            debug=False,
-            verbose=False,
-        )
-        size = line_number * 256
+        if line_number is None:
+            _, line_number = get_linenumber(filename, get_index_file(filename, index_dir))
+        size = line_number * line_size
     logging.debug(f" The {filename} has {size / 1024**3} GB size")
     return int(size)
 
@@ -228,12 +350,71 @@ def io_function(json_dict: dict):
     return d
 
 
+@functools.lru_cache(maxsize=4096)
+def is_ignored_event(name: str) -> bool:
+    # Function names repeat heavily, so each distinct name is matched only once per worker
+    return name in IGNORED_FUNC_NAME_SET or IGNORED_FUNC_PATTERN_REGEX.search(name) is not None
+
+
 def is_pyarrow_dtype_supported() -> bool:
     return sys.version_info >= (3, 9)
 
 
-def load_indexed_gzip_files(filename, start, end):
-    index_file = f"{filename}.zindex"
+def is_converted_trace(trace_path) -> bool:
+    return isinstance(trace_path, str) and os.path.isfile(f"{trace_path}/{CONVERTED_GLOBAL_FILE}")
+
+
+def is_trace_manifest(trace_path) -> bool:
+    return isinstance(trace_path, str) and trace_path.endswith(".parquet") and os.path.isfile(trace_path)
+
+
+def load_batch(
+    batch: Tuple[str, int, int, Optional[str]],
+    columns: Dict[str, str],
+    metadata_columns: Dict[str, str],
+    time_approximate: bool,
+    extra_columns: Optional[Dict[str, str]],
+    extra_columns_fn: Optional[Callable[[dict], dict]],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    filename, start, end, index_file = batch
+    if filename.endswith(".pfw.gz"):
+        json_lines = load_indexed_gzip_files(filename, start, end, index_file)
+    else:
+        json_lines = load_text_file_lines(filename, start, end)
+    return load_objects_partition(
+        json_lines,
+        columns=columns,
+        metadata_columns=metadata_columns,
+        time_approximate=time_approximate,
+        extra_columns=extra_columns,
+        extra_columns_fn=extra_columns_fn,
+    )
+
+
+def load_batch_time_min(batch: Tuple[str, int, int, Optional[str]]) -> Optional[int]:
+    # Only the timestamps are decoded, the same events as `load_objects_batch` has times for
+    filename, start, end, index_file = batch
+    if filename.endswith(".pfw.gz"):
+        json_lines = load_indexed_gzip_files(filename, start, end, index_file)
+    else:
+        json_lines = load_text_file_lines(filename, start, end)
+    time_min = None
+    for line in json_lines:
+        if not line or line[0] in "[]\n":
+            continue
+        try:
+            json_dict = load_json_line(line)
+            if "name" not in json_dict or json_dict.get("ph") == "M" or "dur" not in json_dict:
+                continue
+            ts = int(json_dict["ts"])
+        except ValueError:
+            continue
+        if time_min is None or ts < time_min:
+            time_min = ts
+    return time_min
+
+
+def load_indexed_gzip_files(filename, start, end, index_file):
     json_lines = zindex.zquery(
         filename,
         index_file=index_file,
@@ -245,6 +426,17 @@ def load_indexed_gzip_files(filename, start, end):
     return json_lines
 
 
+def load_json_line(line: str) -> dict:
+    if not line.isascii():
+        line = "".join([i if ord(i) < 128 else "#" for i in line])
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(line, strict=False)
+
+
 def load_objects(
     line: str,
     time_granularity: float,
@@ -336,85 +528,718 @@ def load_objects(
     return {}
 
 
+def load_objects_batch(
+    lines: List[str],
+    time_approximate: bool,
+    extra_columns: Optional[Dict[str, str]],
+    extra_columns_fn: Optional[Callable[[dict], dict]],
+) -> pa.RecordBatch:
+    """Parses a batch of JSON lines into a single Arrow record batch.
+
+    Only the JSON decoding and field extraction run per line; the time
+    intervals are built column-wise over the whole batch. The resulting
+    columns match the dictionaries built by `load_objects`, except for the
+    event ends and time ranges, which depend on the time origin and are set
+    by `normalize_events`. Events of ignored functions are only flagged in
+    `func_ignored` with their times, their other fields are not extracted.
+    They are dropped in `postread_trace`, so that the time origin and raw
+    statistics still cover all events.
+    """
+    batch = {col: [] for col in BATCH_COLUMNS}
+    extras = {col: [] for col in extra_columns or {}}
+    for line in lines:
+        if not line or line[0] in "[]\n":
+            continue
+        extra_row = {}
+        try:
+            json_dict = load_json_line(line)
+            if "name" not in json_dict:
+                continue
+            row = dict(name=json_dict["name"], cat=json_dict.get("cat"))
+            if row["cat"] is not None:
+                row["cat"] = row["cat"].lower()
+            args = json_dict.get("args", {})
+            if "hhash" in args:
+                row["hhash"] = str(args["hhash"])
+            if "M" == json_dict["ph"]:
+                row["type"] = METADATA_TYPES.get(row["name"], 4)
+                if "name" in args and "value" in args:
+                    row["name"] = args["name"]
+                    row["hash" if row["type"] != 4 else "value"] = str(args["value"])
+            else:
+                row["type"] = 0
+                if "dur" in json_dict:
+                    row["ts"] = int(json_dict["ts"])
+                    row["dur"] = int(json_dict["dur"])
+                # Ignored events are dropped after the raw statistics, which only need their times
+                row["func_ignored"] = is_ignored_event(row["name"])
+                if not row["func_ignored"]:
+                    row.update(io_function(json_dict))
+                    extra_row = extra_columns_fn(json_dict) if extra_columns_fn else {}
+                    if extra_columns and not all(col in extra_row for col in extra_columns):
+                        missing_cols = [col for col in extra_columns if col not in extra_row]
+                        raise ValueError(f"Missing extra columns: {missing_cols}")
+        except ValueError as error:
+            logging.error(f"Processing {line} failed with {error}")
+            continue
+        row["pid"] = json_dict.get("pid")
+        row["tid"] = json_dict.get("tid")
+        for col, values in batch.items():
+            values.append(row.get(col))
+        for col, values in extras.items():
+            values.append(extra_row.get(col) if row["type"] == 0 else None)
+
+    arrays = {col: pa.array(values, type=BATCH_COLUMNS[col]) for col, values in batch.items()}
+    if not time_approximate:
+        ts_str = pc.cast(arrays["ts"], pa.string())
+        te_str = pc.cast(pc.add(arrays["ts"], arrays["dur"]), pa.string())
+        # Same format as `portion.to_string`, which collapses [ts,ts] into [ts]
+        arrays["tinterval"] = pc.if_else(
+            pc.equal(arrays["dur"], 0),
+            pc.binary_join_element_wise("[", ts_str, "]", ""),
+            pc.binary_join_element_wise("[", ts_str, ",", te_str, "]", ""),
+        )
+    arrays.update({col: pa.array(values) for col, values in extras.items()})
+    return pa.RecordBatch.from_pydict(arrays)
+
+
+def load_objects_partition(
+    lines: List[str],
+    columns: Dict[str, str],
+    metadata_columns: Dict[str, str],
+    time_approximate: bool,
+    extra_columns: Optional[Dict[str, str]],
+    extra_columns_fn: Optional[Callable[[dict], dict]],
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Parses a batch of JSON lines into an event and a metadata partition.
+
+    Metadata records (FH/HH/SH/PR and others) are split off during the same
+    pass so that they never have to be filtered out of the event stream.
+    """
+    batch = load_objects_batch(
+        lines,
+        time_approximate=time_approximate,
+        extra_columns=extra_columns,
+        extra_columns_fn=extra_columns_fn,
+    )
+    df = batch.to_pandas(types_mapper=pd.ArrowDtype)
+    is_event = (df["type"] == 0).to_numpy(dtype=bool, na_value=False)
+    events = df[is_event].reindex(columns=list(columns)).astype(columns)
+    metadata = df[~is_event].reindex(columns=list(metadata_columns)).astype(metadata_columns)
+    return events, metadata
+
+
+def sample_line_size(filename, line_number, index_file) -> float:
+    """Measures the average decompressed size of the lines of a gz trace.
+
+    Up to `LINE_SAMPLE_SIZE` lines are read from the middle of the file, away
+    from the metadata records at its start.
+    """
+    if line_number <= 0:
+        return DEFAULT_LINE_SIZE
+    start = max(0, line_number // 2 - LINE_SAMPLE_SIZE // 2)
+    end = min(line_number, start + LINE_SAMPLE_SIZE) - 1
+    json_lines = load_indexed_gzip_files(filename, start, end, index_file)
+    if len(json_lines) == 0:
+        return DEFAULT_LINE_SIZE
+    # Count the newline stripped from each line
+    return sum(len(line) + 1 for line in json_lines) / len(json_lines)
+
+
+def normalize_events(
+    df: pd.DataFrame,
+    time_origin: int,
+    time_granularity: float,
+    time_resolution: float,
+) -> pd.DataFrame:
+    ts = df["ts"] - time_origin
+    te = ts + df["dur"]
+    trange = ts // time_granularity
+    if is_pyarrow_dtype_supported():
+        ts = ts.astype("uint64[pyarrow]")
+        te = te.astype("uint64[pyarrow]")
+        trange = trange.astype("uint16[pyarrow]")
+    else:
+        ts = ts.astype("Int64")
+        te = te.astype("Int64")
+        trange = trange.astype("Int16")
+    return df.assign(ts=ts, te=te, trange=trange, dur=df["dur"] / time_resolution)
+
+
+def read_converted_trace(
+    trace_path: str,
+    needed_columns: Optional[List[str]] = None,
+    filters: Optional[List[Tuple[str, str, int]]] = None,
+) -> dd.DataFrame:
+    columns = None
+    if needed_columns is not None:
+        columns = [
+            col
+            for col in dd.read_parquet(f"{trace_path}/*.parquet").columns
+            if col not in PROJECTED_COLUMNS or TRACE_COL_MAPPING.get(col, col) in needed_columns
+        ]
+    return dd.read_parquet(f"{trace_path}/*.parquet", columns=columns, filters=filters)
+
+
+def read_converted_global_min_max(trace_path: str) -> dict:
+    with open(f"{trace_path}/{CONVERTED_GLOBAL_FILE}") as file:
+        global_min_max = json.load(file)
+    return global_min_max
+
+
+def read_trace_manifest(manifest_path: str) -> pd.DataFrame:
+    return pd.read_parquet(manifest_path, columns=list(TRACE_MANIFEST_COLUMNS))
+
+
+def write_trace_manifest(
+    manifest_path: str,
+    trace_files: List[str],
+    line_numbers: Dict[str, int],
+    line_sizes: Dict[str, float],
+    merge: bool = False,
+):
+    """Writes the trace files and their line stats to a Parquet manifest.
+
+    If `merge` is set, the files are added to an existing manifest, replacing
+    the records of the same paths, instead of overwriting it. That way reads of
+    a subset of the files, such as new files or streamed chunks, still leave a
+    manifest of all of them.
+    """
+    records = []
+    for trace_file in trace_files:
+        stat = os.stat(trace_file)
+        records.append(
+            dict(
+                path=os.path.abspath(trace_file),
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                line_count=line_numbers.get(trace_file),
+                line_size=line_sizes.get(trace_file),
+            )
+        )
+    table = pa.Table.from_pylist(records, schema=pa.schema(TRACE_MANIFEST_COLUMNS))
+    if merge and os.path.isfile(manifest_path):
+        previous_table = pq.read_table(manifest_path, columns=list(TRACE_MANIFEST_COLUMNS))
+        is_replaced = pc.is_in(previous_table["path"], value_set=table["path"].combine_chunks())
+        table = pa.concat_tables([previous_table.filter(pc.invert(is_replaced)), table]).sort_by("path")
+    pq.write_table(table, manifest_path)
+    logging.info(f"Wrote trace manifest of {table.num_rows} files to {manifest_path}")
+
+
+def write_converted_trace(
+    events: dd.DataFrame,
+    output_dir: str,
+    row_group_size: int = CONVERTED_ROW_GROUP_SIZE,
+):
+    """Writes parsed events as time-sorted Parquet with a `global.json` of their timestamp range.
+
+    Sorting by `ts` keeps the row group statistics of `ts` narrow, so that
+    time windows are read by pruning row groups instead of scanning them.
+    """
+    # Event ends and time ranges are derived again when the converted traces are read
+    events = events.drop(columns=["te", "trange"], errors="ignore")
+    # The range is taken from the unsorted events, so that the sort only runs once, for writing
+    ts_min, ts_max, te_max = compute(
+        events["ts"].min(),
+        events["ts"].max(),
+        (events["ts"] + events["dur"]).max(),
+    )
+    ensure_dir(output_dir)
+    events.sort_values("ts").to_parquet(
+        output_dir,
+        write_index=False,
+        row_group_size=row_group_size,
+        write_statistics=CONVERTED_STATISTICS_COLUMNS,
+    )
+    # The global file is written last and marks the directory as complete
+    with open(f"{output_dir}/{CONVERTED_GLOBAL_FILE}", "w") as file:
+        json.dump(dict(ts=[int(ts_min), int(ts_max)], te=[int(ts_min), int(te_max)]), file)
+
+
+def write_trace_cache(events: dd.DataFrame, cache_path: str):
+    # Write under a temporary name so that an interrupted write is never taken for a complete cache
+    tmp_cache_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        write_converted_trace(events, tmp_cache_path)
+        os.replace(tmp_cache_path, cache_path)
+        logging.info(f"Wrote parsed traces to cache {cache_path}")
+    except OSError as e:
+        logging.warning(f"Unable to write trace cache {cache_path}: {e}")
+
+
+def load_text_file_lines(filename, start, end):
+    # A line belongs to the batch that contains its first byte
+    json_lines = []
+    with open(filename, "rb") as file:
+        if start > 0:
+            file.seek(start - 1)
+            file.readline()
+        while file.tell() <= end:
+            line = file.readline()
+            if not line:
+                break
+            json_lines.append(line.decode("utf-8", errors="replace"))
+    logging.debug(f"Read {len(json_lines)} json lines for [{start}, {end}] bytes")
+    return json_lines
+
+
+def map_hash_names(
+    df: pd.DataFrame,
+    file_names: pd.Series,
+    host_names: pd.Series,
+    file_classes: pd.DataFrame,
+) -> pd.DataFrame:
+    df = df.assign(
+        **{
+            COL_FILE_NAME: df["fhash"].map(file_names).astype(file_names.dtype),
+            COL_HOST_NAME: df["hhash"].map(host_names).astype(host_names.dtype),
+            "file_ignored": df["fhash"].map(file_classes["ignored"]).fillna(False).astype(bool),
+            "file_cat_suffix": df["fhash"].map(file_classes["cat_suffix"]).fillna("").astype("string[pyarrow]"),
+        }
+    )
+    return df.drop(columns=["fhash", "hhash"])
+
+
 class DFTracerAnalyzer(Analyzer):
-    def read_trace(self, trace_path, extra_columns, extra_columns_fn):
+    def __init__(
+        self,
+        *args,
+        index_dir: Optional[str] = None,
+        index_parallelism: int = INDEX_PARALLELISM,
+        reader_engine: str = READER_ENGINE_BAG,
+        streaming_chunk_size: int = STREAMING_CHUNK_SIZE,
+        trace_cache_dir: Optional[str] = None,
+        trace_manifest: Optional[str] = None,
+        time_window: Optional[List[float]] = None,
+        **kwargs,
+    ):
+        """Initializes the DFTracerAnalyzer instance.
+
+        Args:
+            index_dir: Directory to keep the zindex files of the gz traces in,
+                keyed by path, size and modification time. If not set, each
+                index is written next to its trace.
+            index_parallelism: The maximum number of indexes built at once.
+            reader_engine: How trace batches are turned into partitions. 'bag'
+                parses the partitions of a bag of JSON lines, 'partitioned'
+                loads and parses each (file, start, end) batch in a single task.
+            streaming_chunk_size: The maximum size in bytes of the trace files
+                read at once when streaming. A single larger file is read alone.
+            trace_cache_dir: Directory to cache the parsed, name-resolved events
+                of each set of trace files in as Parquet. Later runs on the same
+                files, e.g. with other view types or time granularities, read
+                the cache instead of parsing the JSON lines again.
+            trace_manifest: Path of a Parquet trace manifest to write after the
+                files of a trace directory are listed and indexed. Files that are
+                read in parts, by incremental or streaming runs, are merged into
+                it. Passing it as the trace path later skips the listing, stat
+                and indexing passes.
+            time_window: The `[start, end)` seconds since the start of the trace
+                to analyze events of. Converted and cached traces are sorted by
+                time, so only the row groups that overlap the window are read.
+        """
+        super().__init__(*args, **kwargs)
+        if reader_engine not in READER_ENGINES:
+            raise ValueError(f"Invalid reader engine: {reader_engine}. Must be one of {READER_ENGINES}.")
+        if time_window is not None and (len(time_window) != 2 or time_window[0] >= time_window[1]):
+            raise ValueError(f"Invalid time window: {time_window}. Must be [start, end] with start < end.")
+        self.index_dir = index_dir
+        self.index_parallelism = index_parallelism
+        self.reader_engine = reader_engine
+        self.streaming_chunk_size = streaming_chunk_size
+        self.trace_cache_dir = trace_cache_dir
+        self.trace_manifest = trace_manifest
+        self.time_window = None if time_window is None else list(time_window)
+        if self.index_dir:
+            ensure_dir(self.index_dir)
+        if self.trace_cache_dir:
+            ensure_dir(self.trace_cache_dir)
+
+    def index_trace_files(self, trace_files: List[str]) -> Dict[str, Tuple[int, float, str]]:
+        """Makes sure every gz trace file has a valid zindex and returns its line stats.
+
+        Line counts and sampled line sizes are kept in a manifest keyed by
+        path, size and modification time, so the indexes of unchanged files are
+        not reopened. Missing or stale indexes are built with at most
+        `index_parallelism` at a time.
+
+        The index path of each file is resolved once, here, and used by every
+        task that reads the file. Resolving it again on the workers would
+        give a new key, and no index, if the file grows during the run.
+
+        Args:
+            trace_files: The list of .pfw.gz trace files.
+
+        Returns:
+            A dictionary mapping each trace file to its number of lines,
+            average decompressed line size in bytes and index file.
+        """
+        manifests = {}
+        for trace_file in trace_files:
+            manifest_path = get_index_manifest_path(trace_file, index_dir=self.index_dir)
+            if manifest_path not in manifests:
+                manifests[manifest_path] = {}
+                if os.path.exists(manifest_path):
+                    with open(manifest_path, "r") as f:
+                        manifests[manifest_path] = json.load(f)
+        line_stats = {}
+        index_keys = {}
+        index_files = {}
+        missing_files = []
+        for trace_file in trace_files:
+            manifest = manifests[get_index_manifest_path(trace_file, index_dir=self.index_dir)]
+            index_key = index_keys[trace_file] = get_index_key(trace_file)
+            index_file = index_files[trace_file] = get_index_file(
+                trace_file,
+                index_dir=self.index_dir,
+                index_key=index_key,
+            )
+            # Entries without a sampled line size are refreshed as well
+            if (
+                isinstance(manifest.get(index_key), list)
+                and len(manifest[index_key]) == 2
+                and os.path.exists(index_file)
+            ):
+                line_stats[trace_file] = (*manifest[index_key], index_file)
+            else:
+                missing_files.append(trace_file)
+        logging.info(f"Found valid index for {len(line_stats)} files, creating index for {len(missing_files)} files")
+        if len(missing_files) == 0:
+            return line_stats
+        created_indexes = (
+            db.from_sequence(
+                [(trace_file, index_files[trace_file]) for trace_file in missing_files],
+                npartitions=min(len(missing_files), self.index_parallelism),
+            )
+            .starmap(create_index)
+            .compute()
+        )
+        for trace_file, line_number, line_size in created_indexes:
+            line_stats[trace_file] = (line_number, line_size, index_files[trace_file])
+            manifest = manifests[get_index_manifest_path(trace_file, index_dir=self.index_dir)]
+            # Drop the entries of previous versions of the same file
+            trace_file_path = os.path.abspath(trace_file)
+            for index_key in [key for key in manifest if key.rsplit(":", 2)[0] == trace_file_path]:
+                del manifest[index_key]
+            manifest[index_keys[trace_file]] = [line_number, line_size]
+        for manifest_path, manifest in manifests.items():
+            try:
+                with open(manifest_path, "w") as f:
+                    json.dump(manifest, f)
+            except OSError as e:
+                logging.warning(f"Unable to write index manifest {manifest_path}: {e}")
+        return line_stats
+
+    def list_trace_chunks(self, trace_path):
+        if is_converted_trace(trace_path):
+            return None
+        trace_files = trace_path if isinstance(trace_path, list) else self.list_trace_files(trace_path)
+        trace_chunks = []
+        chunk_size = 0
+        for trace_file in trace_files:
+            file_size = os.stat(trace_file).st_size
+            if len(trace_chunks) == 0 or chunk_size + file_size > self.streaming_chunk_size:
+                trace_chunks.append([])
+                chunk_size = 0
+            trace_chunks[-1].append(trace_file)
+            chunk_size += file_size
+        return trace_chunks
+
+    def get_time_origin(self, trace_chunks, extra_columns, extra_columns_fn, needed_columns=None):
+        # With a trace cache the chunks are parsed once into their caches here and read from them later,
+        # without one only the timestamps are decoded in a single pass and nothing is persisted
+        time_origins = []
+        uncached_files = []
+        for trace_chunk in trace_chunks:
+            trace_cache_path = None
+            if self.trace_cache_dir:
+                trace_cache_path = self.get_trace_cache_path(
+                    trace_files=trace_chunk,
+                    extra_columns=extra_columns,
+                    needed_columns=needed_columns,
+                )
+            if trace_cache_path is None:
+                uncached_files.extend(trace_chunk)
+                continue
+            if not is_converted_trace(trace_cache_path):
+                write_trace_cache(
+                    self.parse_trace(
+                        trace_path=trace_chunk,
+                        extra_columns=extra_columns,
+                        extra_columns_fn=extra_columns_fn,
+                        needed_columns=needed_columns,
+                    ),
+                    trace_cache_path,
+                )
+                self.release_trace()
+            if is_converted_trace(trace_cache_path):
+                time_origins.append(read_converted_global_min_max(trace_cache_path)["ts"][0])
+            else:
+                uncached_files.extend(trace_chunk)
+        if len(uncached_files) > 0:
+            gz_files = [file for file in uncached_files if file.endswith(".pfw.gz")]
+            line_stats = self.index_trace_files(gz_files) if len(gz_files) > 0 else {}
+            batches = []
+            for file in uncached_files:
+                if file in line_stats:
+                    line_number, line_size, index_file = line_stats[file]
+                    batches.extend(
+                        (filename, start, end, index_file)
+                        for filename, start, end in generate_line_batches(file, line_number, line_size=line_size)
+                    )
+                else:
+                    batches.extend(
+                        (filename, start, end, None)
+                        for filename, start, end in generate_byte_batches(file, get_size(file))
+                    )
+            time_origins.extend(db.from_sequence(batches).map(load_batch_time_min).compute())
+        time_origins = [int(time_origin) for time_origin in time_origins if pd.notna(time_origin)]
+        return min(time_origins) if len(time_origins) > 0 else None
+
+    def release_trace(self):
+        self.all_events = None
+        self.all_metadata = None
+        self.events = None
+        self.file_hash = None
+        self.host_hash = None
+        self.string_hash = None
+        self.metadata = None
+
+    def list_trace_files(self, trace_path):
+        if is_converted_trace(trace_path):
+            # Converted traces are read as a whole
+            return None
+        if is_trace_manifest(trace_path):
+            return read_trace_manifest(trace_path)["path"].tolist()
         if os.path.isdir(trace_path) and "*" not in trace_path:
             trace_path = f"{trace_path}/*.pfw*"
-        # ===============================================
-        file_pattern = glob(trace_path)
         all_files = []
-        pfw_pattern = []
-        pfw_gz_pattern = []
-        for file in file_pattern:
-            if file.endswith(".pfw"):
-                pfw_pattern.append(file)
-                all_files.append(file)
-            elif file.endswith(".pfw.gz"):
-                pfw_gz_pattern.append(file)
+        for file in sorted(glob(trace_path)):
+            if file.endswith(".pfw") or file.endswith(".pfw.gz"):
                 all_files.append(file)
             else:
                 logging.warning(f"Ignoring unsuported file {file}")
+        return all_files
+
+    def convert_trace(self, trace_path: str, output_dir: str, row_group_size: int = CONVERTED_ROW_GROUP_SIZE):
+        """Converts DFTracer traces into a Parquet dataset that is read without parsing.
+
+        The parsed, name-resolved events are sorted by timestamp and written
+        in row groups of `row_group_size` rows with statistics on
+        `CONVERTED_STATISTICS_COLUMNS`. A `global.json` next to the Parquet
+        files keeps the timestamp range, like the Recorder layout. Passing
+        `output_dir` as the trace path of an analysis reads it directly.
+
+        Args:
+            trace_path: Path to the DFTracer trace files or directory.
+            output_dir: Directory to write the converted traces to.
+            row_group_size: The number of events per Parquet row group.
+        """
+        events = self.parse_trace(trace_path=trace_path, extra_columns=None, extra_columns_fn=None)
+        write_converted_trace(events, output_dir, row_group_size=row_group_size)
+        logging.info(f"Converted {trace_path} into {output_dir}")
+
+    def get_time_window_filters(self) -> Optional[List[Tuple[str, str, int]]]:
+        # Events that start within the window, in raw timestamps
+        if self.time_window is None:
+            return None
+        start, end = self.time_window
+        return [
+            ("ts", ">=", self.time_origin + int(start * self.time_resolution)),
+            ("ts", "<", self.time_origin + int(end * self.time_resolution)),
+        ]
+
+    def get_trace_cache_path(
+        self,
+        trace_files: List[str],
+        extra_columns: Optional[Dict[str, str]],
+        needed_columns: Optional[List[str]],
+    ) -> str:
+        # Only the settings that change the parsed events are part of the key,
+        # time granularity and resolution are applied after the cache is read
+        key = json.dumps(
+            dict(
+                categorical_strings=self.categorical_strings,
+                extra_columns=sorted(extra_columns or {}),
+                needed_columns=None if needed_columns is None else sorted(needed_columns),
+                time_approximate=self.time_approximate,
+                trace_files=self.fingerprint_trace_files(trace_files),
+            ),
+            sort_keys=True,
+        )
+        return f"{self.trace_cache_dir}/{hashlib.md5(key.encode('utf-8')).hexdigest()}.parquet"
+
+    def read_trace(self, trace_path, extra_columns, extra_columns_fn, needed_columns=None):
+        events = None
+        converted_path = trace_path if is_converted_trace(trace_path) else None
+        if converted_path is None and self.trace_cache_dir:
+            converted_path = self.get_trace_cache_path(
+                trace_files=trace_path if isinstance(trace_path, list) else self.list_trace_files(trace_path),
+                extra_columns=extra_columns,
+                needed_columns=needed_columns,
+            )
+            if not is_converted_trace(converted_path):
+                events = self.parse_trace(
+                    trace_path=trace_path,
+                    extra_columns=extra_columns,
+                    extra_columns_fn=extra_columns_fn,
+                    needed_columns=needed_columns,
+                )
+                write_trace_cache(events, converted_path)
+        if converted_path is not None and is_converted_trace(converted_path):
+            logging.info(f"Reading converted traces from {converted_path}")
+            # Incremental reads keep the time origin of the previously analyzed files
+            if self.time_origin is None:
+                self.time_origin = read_converted_global_min_max(converted_path)["ts"][0]
+            # Row groups outside of the time window are pruned by their statistics
+            events = read_converted_trace(
+                converted_path,
+                needed_columns=needed_columns,
+                filters=self.get_time_window_filters(),
+            )
+        else:
+            if events is None:
+                events = self.parse_trace(
+                    trace_path=trace_path,
+                    extra_columns=extra_columns,
+                    extra_columns_fn=extra_columns_fn,
+                    needed_columns=needed_columns,
+                )
+            if self.time_origin is None:
+                self.time_origin = int(events["ts"].min().compute())
+            time_window_filters = self.get_time_window_filters()
+            if time_window_filters is not None:
+                (_, _, start), (_, _, end) = time_window_filters
+                events = events[(events["ts"] >= start) & (events["ts"] < end)]
+        # Timestamps are normalized per partition on top of the parsed events
+        # instead of persisting a second copy of them
+        self.events = events.map_partitions(
+            normalize_events,
+            time_origin=self.time_origin,
+            time_granularity=self.time_granularity,
+            time_resolution=self.time_resolution,
+            meta=normalize_events(
+                events._meta,
+                time_origin=0,
+                time_granularity=self.time_granularity,
+                time_resolution=self.time_resolution,
+            ),
+        )
+        return self.events.rename(columns=TRACE_COL_MAPPING)
+
+    def parse_trace(self, trace_path, extra_columns, extra_columns_fn, needed_columns=None) -> dd.DataFrame:
+        """Parses the JSON lines of DFTracer traces into a name-resolved event table.
+
+        Timestamps are kept as traced, so that the table does not depend on
+        the time origin, granularity or resolution of an analysis.
+        """
+        # ===============================================
+        file_sizes = {}
+        line_numbers = {}
+        line_sizes = {}
+        if is_trace_manifest(trace_path):
+            # The manifest already describes the files, so listing, stat and indexing are skipped
+            manifest = read_trace_manifest(trace_path)
+            all_files = manifest["path"].tolist()
+            file_sizes = {path: int(size) for path, size in zip(manifest["path"], manifest["size"])}
+            line_numbers = {
+                path: int(line_count)
+                for path, line_count in zip(manifest["path"], manifest["line_count"])
+                if pd.notna(line_count)
+            }
+            line_sizes = {
+                path: float(line_size)
+                for path, line_size in zip(manifest["path"], manifest["line_size"])
+                if pd.notna(line_size)
+            }
+        elif isinstance(trace_path, list):
+            # A list of files is given when only new files are read incrementally
+            all_files = trace_path
+        else:
+            all_files = self.list_trace_files(trace_path)
+        pfw_pattern = [file for file in all_files if file.endswith(".pfw")]
+        pfw_gz_pattern = [file for file in all_files if file.endswith(".pfw.gz")]
         if len(all_files) == 0:
             logging.error("No files selected for .pfw and .pfw.gz")
             exit(1)
         logging.debug(f"Processing files {all_files}")
-        if len(pfw_gz_pattern) > 0:
-            db.from_sequence(pfw_gz_pattern).map(create_index).compute()
-        logging.info(f"Created index for {len(pfw_gz_pattern)} files")
-        total_size = db.from_sequence(all_files).map(get_size).sum().compute()
+        index_files = {}
+        unindexed_files = [file for file in pfw_gz_pattern if file not in line_numbers or file not in line_sizes]
+        if len(unindexed_files) > 0:
+            for file, (line_number, line_size, index_file) in self.index_trace_files(unindexed_files).items():
+                line_numbers[file] = line_number
+                line_sizes[file] = line_size
+                index_files[file] = index_file
+        logging.info(f"Created index for {len(unindexed_files)} files")
+        # The index paths of the files described by a manifest are resolved once as well
+        for file in pfw_gz_pattern:
+            if file not in index_files:
+                index_files[file] = get_index_file(file, index_dir=self.index_dir)
+        if self.trace_manifest and not is_trace_manifest(trace_path):
+            # Lists of files are subsets of a listing, e.g. new files or a streamed chunk
+            write_trace_manifest(
+                self.trace_manifest,
+                trace_files=all_files,
+                line_numbers=line_numbers,
+                line_sizes=line_sizes,
+                merge=isinstance(trace_path, list),
+            )
+        for file in pfw_pattern:
+            if file not in file_sizes:
+                file_sizes[file] = get_size(file)
+        total_size = sum(file_sizes[file] for file in pfw_pattern)
+        total_size += sum(
+            get_size(file, line_number=line_numbers[file], line_size=line_sizes[file]) for file in pfw_gz_pattern
+        )
         logging.info(f"Total size of all files are {total_size} bytes")
+        batches = []
         gz_bag = None
         pfw_bag = None
         if len(pfw_gz_pattern) > 0:
-            max_line_numbers = dask.bag.from_sequence(pfw_gz_pattern).map(get_linenumber).compute()
+            max_line_numbers = [(filename, line_numbers[filename]) for filename in pfw_gz_pattern]
             logging.debug(f"Max lines per file are {max_line_numbers}")
             json_line_delayed = []
             total_lines = 0
             for filename, max_line in max_line_numbers:
                 total_lines += max_line
-                for _, start, end in generate_line_batches(filename, max_line):
-                    json_line_delayed.append((filename, start, end))
+                for _, start, end in generate_line_batches(filename, max_line, line_size=line_sizes[filename]):
+                    json_line_delayed.append((filename, start, end, index_files[filename]))
 
             logging.info(
                 f"Loading {len(json_line_delayed)} batches out of {len(pfw_gz_pattern)} files and has {total_lines} lines overall"
             )
-            json_line_bags = []
-            for filename, start, end in json_line_delayed:
-                num_lines = end - start + 1
-                json_line_bags.append(dask.delayed(load_indexed_gzip_files, nout=num_lines)(filename, start, end))
-            json_lines = dask.bag.concat(json_line_bags)
-            gz_bag = (
-                json_lines.map(
-                    load_objects,
-                    time_granularity=self.time_granularity,
-                    time_approximate=self.time_approximate,
-                    extra_columns=extra_columns,
-                    extra_columns_fn=extra_columns_fn,
-                )
-                .flatten()
-                .filter(lambda x: "name" in x)
+            gz_line_sizes = [line_sizes[filename] for filename in pfw_gz_pattern]
+            logging.info(
+                f"Planned gz line batches of {PFW_BATCH_SIZE} bytes for line sizes of "
+                f"{min(gz_line_sizes):.0f}-{max(gz_line_sizes):.0f} bytes "
+                f"({int(PFW_BATCH_SIZE // max(gz_line_sizes))}-{int(PFW_BATCH_SIZE // min(gz_line_sizes))} lines per batch)"
             )
+            batches.extend(json_line_delayed)
+            if self.reader_engine == READER_ENGINE_BAG:
+                json_line_bags = []
+                for filename, start, end, index_file in json_line_delayed:
+                    num_lines = end - start + 1
+                    json_line_bags.append(
+                        dask.delayed(load_indexed_gzip_files, nout=num_lines)(filename, start, end, index_file)
+                    )
+                gz_bag = dask.bag.concat(json_line_bags)
         main_bag = None
         if len(pfw_pattern) > 0:
-            pfw_bag = (
-                db.read_text(pfw_pattern)
-                .map(
-                    load_objects,
-                    time_granularity=self.time_granularity,
-                    time_approximate=self.time_approximate,
-                    extra_columns=extra_columns,
-                    extra_columns_fn=extra_columns_fn,
-                )
-                .flatten()
-                .filter(lambda x: "name" in x)
-            )
-        if len(pfw_gz_pattern) > 0 and len(pfw_pattern) > 0:
+            if self.reader_engine == READER_ENGINE_PARTITIONED:
+                for filename in pfw_pattern:
+                    batches.extend(
+                        (filename, start, end, None)
+                        for _, start, end in generate_byte_batches(filename, file_sizes[filename])
+                    )
+            else:
+                pfw_bag = db.read_text(pfw_pattern)
+        if gz_bag is not None and pfw_bag is not None:
             main_bag = db.concat([pfw_bag, gz_bag])
-        elif len(pfw_gz_pattern) > 0:
+        elif gz_bag is not None:
             main_bag = gz_bag
-        elif len(pfw_pattern) > 0:
+        elif pfw_bag is not None:
             main_bag = pfw_bag
-        if main_bag:
+        if main_bag is not None or len(batches) > 0:
             columns = {
                 "name": "string",
                 "cat": "string",
@@ -427,6 +1252,7 @@ class DFTracerAnalyzer(Analyzer):
                 "tinterval": "Int64" if self.time_approximate else "string",
                 "trange": "Int64",
                 "level": "Int8",
+                "func_ignored": "boolean",
             }
             if is_pyarrow_dtype_supported():
                 columns = {
@@ -441,8 +1267,9 @@ class DFTracerAnalyzer(Analyzer):
                     "tinterval": "uint64[pyarrow]",
                     "trange": "uint64[pyarrow]",
                     "level": "uint8[pyarrow]",
+                    "func_ignored": "bool[pyarrow]",
                 }
-                if self.time_approximate:
+                if not self.time_approximate:
                     columns["tinterval"] = "string[pyarrow]"
             columns.update(io_columns())
             file_hash_columns = {
@@ -507,86 +1334,111 @@ class DFTracerAnalyzer(Analyzer):
             columns.update(string_hash_columns)
             columns.update(other_metadata_columns)
             columns.update(extra_columns or {})
-            self.all_events = main_bag.to_dataframe(meta=columns)
-            events = self.all_events.query("type == 0")
+            metadata_columns = dict(type=columns["type"])
+            metadata_columns.update(file_hash_columns)
+            metadata_columns.update(other_metadata_columns)
+            if needed_columns is not None:
+                columns = {
+                    col: dtype
+                    for col, dtype in columns.items()
+                    if col not in PROJECTED_COLUMNS or TRACE_COL_MAPPING.get(col, col) in needed_columns
+                }
+            load_kwargs = dict(
+                columns=columns,
+                metadata_columns=metadata_columns,
+                # Intervals are not built when their column is projected away
+                time_approximate=self.time_approximate or "tinterval" not in columns,
+                extra_columns=extra_columns,
+                extra_columns_fn=extra_columns_fn,
+            )
+            if self.reader_engine == READER_ENGINE_PARTITIONED:
+                logging.info(f"Loading {len(batches)} batches as partitions")
+                loaded_batches = [
+                    dask.delayed(load_batch, nout=2)(batch, **load_kwargs)
+                    for batch in batches
+                ]
+            else:
+                loaded_batches = [
+                    dask.delayed(load_objects_partition, nout=2)(json_lines, **load_kwargs)
+                    for json_lines in main_bag.to_delayed()
+                ]
+            self.all_events = dd.from_delayed(
+                [events for events, _ in loaded_batches],
+                meta=columns,
+                verify_meta=False,
+            )
+            self.all_metadata = dd.from_delayed(
+                [metadata for _, metadata in loaded_batches],
+                meta=metadata_columns,
+                verify_meta=False,
+            )
+            self.n_partition = math.ceil(total_size / PARTITION_SIZE)
+            logging.info(f"Planned {self.n_partition} partitions of {PARTITION_SIZE} bytes for {total_size} bytes")
+            # Persist both outputs together so that the traces are parsed only once
+            self.events, self.all_metadata = persist(
+                self.all_events.repartition(npartitions=self.n_partition),
+                self.all_metadata,
+            )
+            _ = wait([self.events, self.all_metadata])
             self.file_hash = (
-                self.all_events.query("type == 1")[list(file_hash_columns.keys())].groupby("hash").first().persist()
+                self.all_metadata.query("type == 1")[list(file_hash_columns.keys())].groupby("hash").first().persist()
             )
             self.host_hash = (
-                self.all_events.query("type == 2")[list(hostname_hash_columns.keys())]
+                self.all_metadata.query("type == 2")[list(hostname_hash_columns.keys())]
                 .groupby("hash")
                 .first()
                 .persist()
             )
             self.string_hash = (
-                self.all_events.query("type == 3")[list(string_hash_columns.keys())].groupby("hash").first().persist()
+                self.all_metadata.query("type == 3")[list(string_hash_columns.keys())]
+                .groupby("hash")
+                .first()
+                .persist()
             )
-            self.metadata = self.all_events.query("type == 4")[list(other_metadata_columns.keys())].persist()
-            self.n_partition = math.ceil(total_size / (128 * 1024**2))
-            logging.debug(f"Number of partitions used are {self.n_partition}")
-            self.events = events.repartition(npartitions=self.n_partition).persist()
-            _ = wait(self.events)
-            self.events["ts"] = self.events["ts"] - self.events["ts"].min()
-            self.events["te"] = self.events["ts"] + self.events["dur"]
-            self.events["trange"] = self.events["ts"] // self.time_granularity
-            if is_pyarrow_dtype_supported():
-                self.events["ts"] = self.events["ts"].astype("uint64[pyarrow]")
-                self.events["te"] = self.events["te"].astype("uint64[pyarrow]")
-                self.events["trange"] = self.events["trange"].astype("uint16[pyarrow]")
-            else:
-                self.events["ts"] = self.events["ts"].astype("Int64")
-                self.events["te"] = self.events["te"].astype("Int64")
-                self.events["trange"] = self.events["trange"].astype("Int16")
-            self.events = self.events.persist()
+            self.metadata = self.all_metadata.query("type == 4")[list(other_metadata_columns.keys())].persist()
             _ = wait(
                 [
                     self.file_hash,
                     self.host_hash,
                     self.string_hash,
                     self.metadata,
-                    self.events,
                 ]
             )
         else:
             logging.error("Unable to load traces")
             exit(1)
         # ===============================================
-        self.events["dur"] = self.events["dur"] / self.time_resolution
 
-        file_hashes = self.file_hash[["name"]].rename(columns={"name": COL_FILE_NAME})
+        # Hash tables are tiny compared to the events, so they are collected once
+        # and resolved per partition instead of joining them with a shuffle
+        file_names = self.file_hash["name"].compute()
         host_hhash_empty = self.host_hash["hhash"].isna().all().compute()
         if host_hhash_empty:
-            host_hashes = self.host_hash[["name"]].rename(columns={"name": COL_HOST_NAME})
+            host_names = self.host_hash["name"].compute()
         else:
-            host_hashes = self.host_hash.set_index("hhash")[["name"]].rename(columns={"name": COL_HOST_NAME})
-
-        self.events = (
-            self.events.merge(
-                file_hashes,
-                how="left",
-                left_on="fhash",
-                right_index=True,
-            )
-            .merge(
-                host_hashes,
-                how="left",
-                left_on="hhash",
-                right_index=True,
-            )
-            .drop(columns=["fhash", "hhash"])
-        )
+            host_names = self.host_hash.set_index("hhash")["name"].compute()
+        host_names = host_names[~host_names.index.duplicated()]
+        file_classes = classify_file_names(file_names)
+        if self.categorical_strings:
+            # File names are dictionary-encoded right away since their categories are known
+            file_names = file_names.astype(pd.CategoricalDtype(file_names.dropna().unique()))
 
-        return self.events.rename(columns=TRACE_COL_MAPPING)
+        return self.events.map_partitions(
+            map_hash_names,
+            file_names=dask.delayed(file_names, pure=True),
+            host_names=dask.delayed(host_names, pure=True),
+            file_classes=dask.delayed(file_classes, pure=True),
+            meta=map_hash_names(self.events._meta, file_names.iloc[:0], host_names.iloc[:0], file_classes.iloc[:0]),
+        )
 
     def postread_trace(
         self,
         traces: dd.DataFrame,
         view_types: List[ViewType],
     ) -> dd.DataFrame:
-        # Ignore redundant files
-        traces = traces[
-            traces[COL_FILE_NAME].isna() | ~traces[COL_FILE_NAME].str.contains("|".join(IGNORED_FILE_PATTERNS))
-        ]
+        # Ignore redundant files, file names are classified once per distinct name in `classify_file_names`
+        # Ignore redundant function calls, each distinct name is matched once in `is_ignored_event`
+        traces = traces[~traces["file_ignored"] & ~traces["func_ignored"]]
 
         # Set proc names
         traces[COL_PROC_NAME] = (
@@ -619,10 +1471,6 @@ class DFTracerAnalyzer(Analyzer):
         #     traces[COL_EPOCH].replace({0: pd.NA}).astype('uint64[pyarrow]')
         # )
 
-        # Ignore redundant function calls
-        traces = traces[~traces[COL_FUNC_NAME].isin(IGNORED_FUNC_NAMES)]
-        traces = traces[~traces[COL_FUNC_NAME].str.contains("|".join(IGNORED_FUNC_PATTERNS))]
-
         # traces['compute_time'] = traces['compute_time'] / DFTRACER_TIME_RESOLUTION
         # traces['checkpoint_time'] = traces['checkpoint_time'] / DFTRACER_TIME_RESOLUTION
         # traces['read_time'] = traces['read_time'] / DFTRACER_TIME_RESOLUTION
@@ -666,30 +1514,12 @@ class DFTracerAnalyzer(Analyzer):
         #     self._set_steps, step_time_ranges=step_time_ranges.reset_index()
         # )
 
+        # Tag posix and stdio categories by the kind of file they access, see `FILE_CAT_SUFFIXES`
         traces["cat"] = traces["cat"].mask(
-            traces["cat"].str.contains("posix|stdio")
-            & ~traces["file_name"].isna()
-            & traces["file_name"].str.contains("/checkpoint"),
-            traces["cat"] + "_checkpoint",
-        )
-        traces["cat"] = traces["cat"].mask(
-            traces["cat"].str.contains("posix|stdio")
-            & ~traces["file_name"].isna()
-            & traces["file_name"].str.contains("/data"),
-            traces["cat"] + "_reader",
-        )
-        traces["cat"] = traces["cat"].mask(
-            traces["cat"].str.contains("posix|stdio")
-            & ~traces["file_name"].isna()
-            & traces["file_name"].str.contains("/lustre"),
-            traces["cat"] + "_lustre",
-        )
-        traces["cat"] = traces["cat"].mask(
-            traces["cat"].str.contains("posix|stdio")
-            & ~traces["file_name"].isna()
-            & traces["file_name"].str.contains("/ssd"),
-            traces["cat"] + "_ssd",
+            traces["cat"].str.contains("posix|stdio") & (traces["file_cat_suffix"] != ""),
+            traces["cat"] + traces["file_cat_suffix"],
         )
+        traces = traces.drop(columns=["file_ignored", "file_cat_suffix", "func_ignored"])
 
         traces["size"] = traces["size"].replace(0, np.nan)
 
@@ -2,8 +2,7 @@ import dask.dataframe as dd
 import json
 import numpy as np
 import pandas as pd
-from dask.distributed import Future, get_client
-from typing import List, Union
+from typing import List
 
 from .analyzer import Analyzer
 from .constants import COL_FUNC_NAME, COL_TIME, COL_TIME_END, COL_TIME_START, IO_CATS
@@ -29,19 +28,34 @@ DROPPED_COLS = [
     'tmid',
     'tstart',
 ]
+# Raw columns that the job time spans, over all records
+JOB_TIME_COLS = ['tend', 'tstart']
+# Raw columns read regardless of the analysis since they are used to post-process the traces
+REQUIRED_COLS = ['acc_pat', 'cat', 'io_cat', 'tmid']
 TRACE_COL_MAPPING = {
     'duration': COL_TIME,
     'func_id': COL_FUNC_NAME,
     'tend': COL_TIME_END,
     'tstart': COL_TIME_START,
 }
+TRACE_FILTERS = [('cat', '==', CAT_POSIX), ('io_cat', 'in', IO_CATS)]
 
 
 class RecorderAnalyzer(Analyzer):
-    def read_trace(self, trace_path, extra_columns, extra_columns_fn):
+    def read_trace(self, trace_path, extra_columns, extra_columns_fn, needed_columns=None):
         self.global_min_max = self._load_global_min_max(trace_path=trace_path)
-        traces = dd.read_parquet(trace_path).rename(columns=TRACE_COL_MAPPING)
-        return traces
+        columns = None
+        if needed_columns is not None:
+            columns = [
+                col
+                for col in dd.read_parquet(trace_path).columns
+                if col in REQUIRED_COLS or TRACE_COL_MAPPING.get(col, col) in needed_columns
+            ]
+        # The filters may only prune row groups, so the rows of the remaining ones are filtered as well
+        traces = dd.read_parquet(trace_path, columns=columns, filters=TRACE_FILTERS)
+        traces = traces[(traces['cat'] == CAT_POSIX) & traces['io_cat'].isin(IO_CATS)]
+        self.job_times = dd.read_parquet(trace_path, columns=JOB_TIME_COLS).rename(columns=TRACE_COL_MAPPING)
+        return traces.rename(columns=TRACE_COL_MAPPING)
 
     def postread_trace(
         self,
@@ -53,27 +67,19 @@ class RecorderAnalyzer(Analyzer):
         traces['count'] = 1
         traces['count'] = traces['count'].astype('uint64[pyarrow]')
         traces['io_cat'] = traces['io_cat'].astype('uint8[pyarrow]')
-        time_ranges = self._compute_time_ranges(
-            global_min_max=self.global_min_max,
+        # Non-POSIX and non-I/O records are already filtered out in `read_trace`
+        traces = traces.map_partitions(
+            self._set_time_ranges,
+            tmid_min=self.global_min_max['tmid'][0],
             time_granularity=self.time_granularity,
-        )
-        traces = (
-            traces[(traces['cat'] == CAT_POSIX) & (traces['io_cat'].isin(IO_CATS))]
-            .map_partitions(self._set_time_ranges, time_ranges=time_ranges)
-            .drop(columns=DROPPED_COLS, errors='ignore')
-        )
+        ).drop(columns=DROPPED_COLS, errors='ignore')
         traces['cat'] = 'posix'
         traces['cat'] = traces['cat'].astype('string[pyarrow]')
         return traces
 
-    def compute_total_count(self, traces: dd.DataFrame) -> int:
-        return traces[(traces['cat'] == CAT_POSIX) & (traces['io_cat'].isin(IO_CATS))].index.count().persist()
-
-    @staticmethod
-    def _compute_time_ranges(global_min_max: dict, time_granularity: int):
-        tmid_min, tmid_max = global_min_max['tmid']
-        time_ranges = np.arange(tmid_min, tmid_max, time_granularity)
-        return get_client().scatter(time_ranges)
+    def compute_job_time(self, traces: dd.DataFrame) -> float:
+        # The job spans all records, not only the POSIX I/O ones that are read for the analysis
+        return super().compute_job_time(traces=self.job_times)
 
     @staticmethod
     def _load_global_min_max(trace_path: str) -> dict:
@@ -82,7 +88,7 @@ class RecorderAnalyzer(Analyzer):
         return global_min_max
 
     @staticmethod
-    def _set_time_ranges(df: pd.DataFrame, time_ranges: Union[Future, np.ndarray]):
-        if isinstance(time_ranges, Future):
-            time_ranges = time_ranges.result()
-        return df.assign(time_range=np.digitize(df['tmid'], bins=time_ranges, right=True))
+    def _set_time_ranges(df: pd.DataFrame, tmid_min: float, time_granularity: int):
+        # Same bins as digitizing `tmid` against `np.arange(tmid_min, tmid_max, time_granularity)` with `right=True`
+        time_ranges = np.ceil((df['tmid'].to_numpy(dtype=np.float64) - tmid_min) / time_granularity)
+        return df.assign(time_range=time_ranges.astype(np.int64))
@@ -1,24 +1,58 @@
 import dask.dataframe as dd
-import itertools as it
 import numpy as np
 import pandas as pd
 import portion as P
 
+from .sketches import (
+    empty_sketch,
+    hll_from_hashes,
+    hll_union,
+    tdigest_from_values,
+    tdigest_trimmed_stats,
+    tdigest_union,
+)
+
+
+def empty_codes() -> np.ndarray:
+    return np.array([], dtype=np.uint64)
+
+
+def encode_sketch(values: pd.Series) -> np.ndarray:
+    return hll_from_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+
+def encode_unique(values: pd.Series) -> np.ndarray:
+    """Encodes the distinct values of a series as a sorted array of integer codes.
+
+    Categorical values are encoded with their dictionary codes, any other
+    values with their 64-bit hashes so that codes match across partitions.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes = values.cat.codes.to_numpy()
+    else:
+        codes = pd.util.hash_pandas_object(values, index=False).to_numpy()
+    return np.unique(codes).astype(np.uint64, copy=False)
+
 
 def nunique():
     return dd.Aggregation(
         name="nunique",
         chunk=lambda s: s.apply(lambda x: list(set(x))),
-        agg=lambda s0: s0.obj.groupby(level=list(range(s0.obj.index.nlevels))).sum(),
+        agg=lambda s0: s0.obj.groupby(level=list(range(s0.obj.index.nlevels)), observed=True).sum(),
         finalize=lambda s1: s1.apply(lambda final: len(set(final))),
     )
 
 
-def quantile_stats(min, max):
-    def quantile_stats_finalize(values_list):
-        if len(values_list) == 0:
+def quantile_stats(ranges, exact=False):
+    """Computes the trimmed mean, std and count of each quantile range in one pass.
+
+    Each group carries a single t-digest (or, if `exact`, its sorted values)
+    from which the statistics of all `ranges` are derived, zeros excluded.
+    """
+
+    def exact_stats(values_array, min, max):
+        if len(values_array) == 0:
             return [np.nan, np.nan, np.nan]
-        values_array = np.array(values_list)
         q_min, q_max = np.quantile(values_array, [min, max])
         filtered_mask = (values_array >= q_min) & (values_array <= q_max)
         filtered_values = values_array[filtered_mask]
@@ -26,32 +60,71 @@ def quantile_stats(min, max):
             return [np.nan, np.nan, np.nan]
         return [np.mean(filtered_values), np.std(filtered_values), len(filtered_values)]
 
+    def union_values(value_arrays):
+        value_arrays = [values for values in value_arrays if isinstance(values, np.ndarray) and len(values) > 0]
+        if len(value_arrays) == 0:
+            return np.array([], dtype=np.float64)
+        return np.concatenate(value_arrays)
+
+    encode = np.asarray if exact else tdigest_from_values
+    union = union_values if exact else tdigest_union
+    stats = exact_stats if exact else tdigest_trimmed_stats
+
+    return dd.Aggregation(
+        'quantile_stats',
+        lambda s: s.apply(lambda x: encode(x.replace(0, np.nan).dropna().to_numpy(dtype=np.float64))),
+        lambda s0: s0.apply(union),
+        lambda s1: s1.apply(lambda x: [stats(x, min, max) for min, max in ranges]),
+    )
+
+
+def quantile_stats_name(min, max):
+    return f"q{min * 100:.0f}_q{max * 100:.0f}_stats"
+
+
+def unique_codes():
     return dd.Aggregation(
-        f"q{min * 100:.0f}_q{max * 100:.0f}_stats",
-        lambda s: s.apply(lambda x: x.replace(0, np.nan).dropna().tolist()),
-        lambda s0: s0.obj.groupby(level=0).sum(),
-        lambda s1: s1.apply(quantile_stats_finalize),
+        'unique',
+        lambda s: s.apply(lambda x: empty_codes() if pd.isna(x).any() else encode_unique(x)),
+        lambda s0: s0.apply(union_codes),
+        lambda s1: s1.apply(lambda x: x if len(x) > 0 else pd.NA),
     )
 
 
-def unique_set():
+def unique_codes_flatten():
     return dd.Aggregation(
         'unique',
-        lambda s: s.apply(lambda x: set() if pd.isna(x).any() else set(x)),
-        lambda s0: s0.apply(lambda x: set(it.chain.from_iterable(x))),
-        lambda s1: s1.apply(lambda x: set(x) if len(x) > 0 else pd.NA),
+        lambda s: s.apply(lambda x: empty_codes() if pd.isna(x).any() else union_codes(x)),
+        lambda s0: s0.agg(union_codes),
+        lambda s1: s1,
     )
 
 
-def unique_set_flatten():
+def unique_sketch():
     return dd.Aggregation(
         'unique',
-        lambda s: s.apply(lambda x: set() if pd.isna(x).any() else set().union(*x)),
-        lambda s0: s0.agg(lambda x: set().union(*x)),
-        lambda s1: s1.apply(set),
+        lambda s: s.apply(lambda x: empty_sketch() if pd.isna(x).any() else encode_sketch(x)),
+        lambda s0: s0.apply(hll_union),
+        lambda s1: s1.apply(lambda x: x if len(x) > 0 else pd.NA),
     )
 
 
+def unique_sketch_flatten():
+    return dd.Aggregation(
+        'unique',
+        lambda s: s.apply(lambda x: empty_sketch() if pd.isna(x).any() else hll_union(x)),
+        lambda s0: s0.agg(hll_union),
+        lambda s1: s1,
+    )
+
+
+def union_codes(code_arrays) -> np.ndarray:
+    code_arrays = [codes for codes in code_arrays if isinstance(codes, np.ndarray) and len(codes) > 0]
+    if len(code_arrays) == 0:
+        return empty_codes()
+    return np.unique(np.concatenate(code_arrays))
+
+
 def union_portions():
     def union_s(s):
         emp = P.empty()
@@ -0,0 +1,134 @@
+import numpy as np
+
+
+HLL_PRECISION = 12
+HLL_RANK_BITS = 6
+HLL_RANK_MASK = np.uint32((1 << HLL_RANK_BITS) - 1)
+TDIGEST_COMPRESSION = 200
+
+
+def count_leading_zeros(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.uint64, copy=True)
+    zeros = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[mask] += shift
+        values[mask] <<= np.uint64(shift)
+    zeros[values == 0] += 1
+    return zeros
+
+
+def empty_sketch() -> np.ndarray:
+    return np.array([], dtype=np.uint32)
+
+
+def hll_from_hashes(hashes: np.ndarray, precision: int = HLL_PRECISION) -> np.ndarray:
+    """Builds a HyperLogLog sketch from 64-bit hashes.
+
+    A sketch is a sorted `uint32` array holding one `(register << 6) | rank`
+    entry per non-empty register, so it never grows past `2 ** precision`
+    entries and can be stored in Parquet like any other array column.
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    registers = (hashes >> np.uint64(64 - precision)).astype(np.uint32)
+    ranks = np.minimum(count_leading_zeros(hashes << np.uint64(precision)), 64 - precision) + 1
+    return _compact((registers << np.uint32(HLL_RANK_BITS)) | ranks.astype(np.uint32))
+
+
+def hll_union(sketches) -> np.ndarray:
+    sketches = [sketch for sketch in sketches if isinstance(sketch, np.ndarray) and len(sketch) > 0]
+    if len(sketches) == 0:
+        return empty_sketch()
+    if len(sketches) == 1:
+        return sketches[0]
+    return _compact(np.concatenate(sketches))
+
+
+def hll_estimate(sketch, precision: int = HLL_PRECISION) -> int:
+    """Estimates the number of distinct values seen by a HyperLogLog sketch.
+
+    The relative standard error is `1.04 / sqrt(2 ** precision)`, about 1.6%
+    with the default precision of 12 (4096 registers). Small cardinalities are
+    estimated with linear counting, which is close to exact.
+    """
+    if not isinstance(sketch, np.ndarray) or len(sketch) == 0:
+        return 0
+    num_registers = 1 << precision
+    registers = np.zeros(num_registers, dtype=np.float64)
+    registers[sketch >> np.uint32(HLL_RANK_BITS)] = sketch & HLL_RANK_MASK
+    alpha = 0.7213 / (1 + 1.079 / num_registers)
+    estimate = alpha * num_registers**2 / np.sum(np.power(2.0, -registers))
+    num_zeros = num_registers - len(sketch)
+    if estimate <= 2.5 * num_registers and num_zeros > 0:
+        estimate = num_registers * np.log(num_registers / num_zeros)
+    return int(round(estimate))
+
+
+def empty_digest() -> np.ndarray:
+    return np.empty((0, 3), dtype=np.float64)
+
+
+def tdigest_from_values(values: np.ndarray, compression: int = TDIGEST_COMPRESSION) -> np.ndarray:
+    """Builds a t-digest from raw values.
+
+    A digest is a `(n, 3)` array of `[weight, sum, sum of squares]` centroids
+    sorted by their means. Centroids are merged with the arcsine scale
+    function, so a digest holds at most about `compression / 2` centroids
+    while the tails, where the trimmed statistics cut, stay close to exact.
+    """
+    values = np.sort(np.asarray(values, dtype=np.float64))
+    if len(values) == 0:
+        return empty_digest()
+    return _merge_centroids(np.column_stack([np.ones(len(values)), values, values * values]), compression)
+
+
+def tdigest_union(digests, compression: int = TDIGEST_COMPRESSION) -> np.ndarray:
+    digests = [digest for digest in digests if isinstance(digest, np.ndarray) and len(digest) > 0]
+    if len(digests) == 0:
+        return empty_digest()
+    if len(digests) == 1:
+        return digests[0]
+    centroids = np.concatenate(digests)
+    centroids = centroids[np.argsort(centroids[:, 1] / centroids[:, 0], kind="stable")]
+    return _merge_centroids(centroids, compression)
+
+
+def tdigest_trimmed_stats(digest: np.ndarray, q_min: float, q_max: float):
+    """Computes the mean, std and count of the values between two quantiles of a t-digest.
+
+    Centroids that straddle a quantile boundary contribute the overlapping
+    fraction of their weight, sum and sum of squares.
+    """
+    if len(digest) == 0:
+        return [np.nan, np.nan, np.nan]
+    weights = digest[:, 0]
+    upper = np.cumsum(weights)
+    lower = upper - weights
+    total = upper[-1]
+    overlap = np.minimum(upper, q_max * total) - np.maximum(lower, q_min * total)
+    fractions = np.clip(overlap, 0, None) / weights
+    count, total_sum, total_sum_sq = fractions @ digest
+    if count <= 0:
+        return [np.nan, np.nan, np.nan]
+    mean = total_sum / count
+    std = np.sqrt(max(total_sum_sq / count - mean * mean, 0.0))
+    return [mean, std, int(round(count))]
+
+
+def _compact(entries: np.ndarray) -> np.ndarray:
+    # Keep the max rank per register, entries of the same register are adjacent after sorting
+    entries = np.unique(entries)
+    is_last = np.ones(len(entries), dtype=bool)
+    is_last[:-1] = (entries[1:] >> np.uint32(HLL_RANK_BITS)) != (entries[:-1] >> np.uint32(HLL_RANK_BITS))
+    return entries[is_last]
+
+
+def _merge_centroids(centroids: np.ndarray, compression: int) -> np.ndarray:
+    # Centroids must be sorted by mean, neighbours that fall into the same unit of the scale function are merged
+    weights = centroids[:, 0]
+    cumulative = np.cumsum(weights)
+    quantiles = (cumulative - weights / 2) / cumulative[-1]
+    scale = compression / (2 * np.pi) * np.arcsin(2 * quantiles - 1) + compression / 4
+    buckets = np.floor(scale)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    return np.add.reduceat(centroids, starts, axis=0)
@@ -0,0 +1,198 @@
+import darshan as d
+import numpy as np
+import pandas as pd
+import pytest
+from glob import glob
+from dfanalyzer.constants import IOCategory
+from dfanalyzer.darshan import TRACE_COL_MAPPING, read_dxt_dataframe, read_file_name_view
+
+
+DXT_TRACE_PATH = "tests/data/extracted/darshan-posix-dxt"
+TRACE_PATH = "tests/data/extracted/darshan-posix"
+
+
+@pytest.mark.smoke
+@pytest.mark.full
+@pytest.mark.parametrize("time_granularity", [1, 1e6])
+def test_create_dxt_dataframe(time_granularity: float) -> None:
+    """Test that the vectorized DXT expansion matches expanding the records one by one."""
+    trace_files = sorted(glob(f"{DXT_TRACE_PATH}/*.darshan"))
+    assert len(trace_files) > 0
+    for trace_file in trace_files:
+        expected_df = _expand_dxt_records(d.DarshanReport(trace_file, read_all=True), time_granularity)
+        dxt_df = read_dxt_dataframe(trace_file, time_granularity)
+        assert len(dxt_df) > 0
+        pd.testing.assert_frame_equal(dxt_df, expected_df, check_dtype=False)
+
+
+@pytest.mark.smoke
+@pytest.mark.full
+def test_create_file_name_view() -> None:
+    """Test that the declarative counter map gives the same view as deriving each metric from its counters."""
+    trace_files = sorted(glob(f"{TRACE_PATH}/*.darshan"))
+    assert len(trace_files) > 0
+    sort_cols = ["proc_name", "file_name", "count", "size", "time"]
+    for trace_file in trace_files:
+        expected_view = _derive_file_name_view(d.DarshanReport(trace_file, read_all=True))
+        file_name_view = read_file_name_view(trace_file)
+        assert len(file_name_view) > 0
+        pd.testing.assert_frame_equal(
+            file_name_view.sort_values(sort_cols).reset_index(drop=True),
+            expected_view.sort_values(sort_cols).reset_index(drop=True),
+            check_dtype=False,
+            check_like=True,
+        )
+
+
+def _derive_file_name_view(report: d.DarshanReport) -> pd.DataFrame:
+    # The per-counter derivation the counter map replaces, counters missing from the log count as zero
+    posix_df = report.records['POSIX'].to_df()
+    file_name_df = pd.DataFrame.from_dict(report.name_records, orient='index', columns=['file_name'])
+    view = (
+        posix_df['counters']
+        .set_index(['rank', 'id'])
+        .merge(posix_df['fcounters'].set_index(['rank', 'id']), left_index=True, right_index=True)
+    )
+    if 'STDIO' in report.records:
+        stdio_df = report.records['STDIO'].to_df()
+        view = view.merge(
+            stdio_df['counters'].set_index(['rank', 'id']),
+            left_index=True,
+            right_index=True,
+            how='outer',
+        ).merge(
+            stdio_df['fcounters'].set_index(['rank', 'id']),
+            left_index=True,
+            right_index=True,
+            how='outer',
+        )
+    view = (
+        view.merge(file_name_df, left_on='id', right_index=True)
+        .reset_index()
+        .assign(proc_name=lambda x: 'app#localhost#' + x['rank'].astype(str) + '#0')
+        .query('~(file_name.str.startswith("<") and file_name.str.endswith(">"))')
+    )
+
+    def counter(name):
+        return view[name].fillna(0) if name in view.columns else pd.Series(0, index=view.index)
+
+    file_name_view = view[['file_name', 'proc_name']].copy()
+    file_name_view['time'] = (
+        counter('POSIX_F_READ_TIME')
+        + counter('POSIX_F_WRITE_TIME')
+        + counter('POSIX_F_META_TIME')
+        + counter('STDIO_F_READ_TIME')
+        + counter('STDIO_F_WRITE_TIME')
+        + counter('STDIO_F_META_TIME')
+    )
+    file_name_view['read_time'] = counter('POSIX_F_READ_TIME') + counter('STDIO_F_READ_TIME')
+    file_name_view['write_time'] = counter('POSIX_F_WRITE_TIME') + counter('STDIO_F_WRITE_TIME')
+    file_name_view['metadata_time'] = counter('POSIX_F_META_TIME') + counter('STDIO_F_META_TIME')
+    file_name_view['data_time'] = file_name_view['read_time'] + file_name_view['write_time']
+    file_name_view['close_time'] = np.nan
+    file_name_view['open_time'] = np.nan
+    file_name_view['seek_time'] = np.nan
+    file_name_view['stat_time'] = np.nan
+    file_name_view['count'] = (
+        counter('POSIX_OPENS')
+        + counter('POSIX_FILENOS')
+        + counter('POSIX_DUPS')
+        + counter('POSIX_READS')
+        + counter('POSIX_WRITES')
+        + counter('POSIX_SEEKS')
+        + counter('POSIX_STATS')
+        + counter('POSIX_FSYNCS')
+        + counter('POSIX_FDSYNCS')
+        + counter('STDIO_OPENS')
+        + counter('STDIO_FDOPENS')
+        + counter('STDIO_READS')
+        + counter('STDIO_WRITES')
+        + counter('STDIO_SEEKS')
+        + counter('STDIO_FLUSHES')
+    )
+    file_name_view['read_count'] = counter('POSIX_READS') + counter('STDIO_READS')
+    file_name_view['write_count'] = counter('POSIX_WRITES') + counter('STDIO_WRITES')
+    file_name_view['data_count'] = file_name_view['read_count'] + file_name_view['write_count']
+    file_name_view['metadata_count'] = (
+        counter('POSIX_OPENS')
+        + counter('POSIX_FILENOS')
+        + counter('POSIX_DUPS')
+        + counter('POSIX_SEEKS')
+        + counter('POSIX_STATS')
+        + counter('POSIX_FSYNCS')
+        + counter('POSIX_FDSYNCS')
+        + counter('STDIO_OPENS')
+        + counter('STDIO_FDOPENS')
+        + counter('STDIO_SEEKS')
+        + counter('STDIO_FLUSHES')
+    )
+    file_name_view['close_count'] = np.nan
+    file_name_view['open_count'] = counter('POSIX_OPENS') + counter('STDIO_OPENS')
+    file_name_view['seek_count'] = counter('POSIX_SEEKS') + counter('STDIO_SEEKS')
+    file_name_view['stat_count'] = counter('POSIX_STATS')
+    file_name_view['size_min'] = np.nan
+    file_name_view['size_max'] = np.maximum(counter('POSIX_MAX_BYTE_READ'), counter('POSIX_MAX_BYTE_WRITTEN'))
+    file_name_view['read_min'] = np.nan
+    file_name_view['read_max'] = np.maximum(counter('POSIX_MAX_BYTE_READ'), counter('STDIO_MAX_BYTE_READ'))
+    file_name_view['write_min'] = np.nan
+    file_name_view['write_max'] = np.maximum(counter('POSIX_MAX_BYTE_WRITTEN'), counter('STDIO_MAX_BYTE_WRITTEN'))
+    file_name_view['size'] = (
+        counter('POSIX_BYTES_READ')
+        + counter('POSIX_BYTES_WRITTEN')
+        + counter('STDIO_BYTES_READ')
+        + counter('STDIO_BYTES_WRITTEN')
+    )
+    file_name_view['read_size'] = counter('POSIX_BYTES_READ') + counter('STDIO_BYTES_READ')
+    file_name_view['write_size'] = counter('POSIX_BYTES_WRITTEN') + counter('STDIO_BYTES_WRITTEN')
+    file_name_view['data_size'] = file_name_view['read_size'] + file_name_view['write_size']
+    file_name_view['sequential_time'] = np.nan
+    file_name_view['sequential_count'] = counter('POSIX_SEQ_READS') + counter('POSIX_SEQ_WRITES')
+    file_name_view['sequential_size'] = np.nan
+    file_name_view['random_time'] = np.nan
+    file_name_view['random_count'] = file_name_view['count'] - file_name_view['sequential_count']
+    file_name_view['random_size'] = np.nan
+    count_cols = [col for col in file_name_view.columns if col.endswith('_count')]
+    size_cols = [col for col in file_name_view.columns if col.endswith('_size')]
+    time_cols = [col for col in file_name_view.columns if col.endswith('_time')]
+    file_name_view[count_cols] = file_name_view[count_cols].astype('Int64')
+    file_name_view[size_cols] = file_name_view[size_cols].astype('Int64')
+    file_name_view[time_cols] = file_name_view[time_cols].astype('Float64')
+    return file_name_view.reset_index(drop=True)
+
+
+def _expand_dxt_records(report: d.DarshanReport, time_granularity: float) -> pd.DataFrame:
+    # The per-record expansion the vectorized one replaces
+    dxt_df = pd.DataFrame(report.records['DXT_POSIX'].to_df())
+    dxt_rows = []
+    for _, record in dxt_df.iterrows():
+        file_name = report.data['name_records'][record['id']]
+        proc_name = f"app#localhost#{record['rank']}#0"
+        for segments_col, func_name, io_cat in [
+            ('read_segments', 'read', IOCategory.READ.value),
+            ('write_segments', 'write', IOCategory.WRITE.value),
+        ]:
+            segments = record[segments_col]
+            if segments.empty:
+                continue
+            lengths = segments['length'].tolist()
+            start_times = segments['start_time'].tolist()
+            end_times = segments['end_time'].tolist()
+            for i in range(len(lengths)):
+                dxt_rows.append(
+                    {
+                        'file_name': file_name,
+                        'proc_name': proc_name,
+                        'size': lengths[i],
+                        'end_time': end_times[i],
+                        'start_time': start_times[i],
+                        'func_name': func_name,
+                        'host_name': record['hostname'],
+                        'io_cat': io_cat,
+                        'time_range': int(start_times[i] * time_granularity),
+                        'cat': 'posix',
+                        'acc_pat': 0,
+                        'count': 1,
+                        'time': end_times[i] - start_times[i],
+                    }
+                )
+    return pd.DataFrame(dxt_rows).rename(columns=TRACE_COL_MAPPING)
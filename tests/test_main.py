@@ -1,8 +1,15 @@
+import dask
+import numpy as np
+import pandas as pd
 import pathlib
 import pytest
 import random
+import shutil
 from glob import glob
+from typing import Dict, List, Optional, Tuple
 from dfanalyzer import init_with_hydra
+from dfanalyzer.dftracer import DFTracerAnalyzer
+from dfanalyzer.types import AnalyzerResultType
 
 
 # Full test matrix for comprehensive testing
@@ -68,6 +75,251 @@ def test_e2e_smoke(
     )
 
 
+@pytest.mark.full
+@pytest.mark.parametrize(
+    "analyzer, preset, trace_path",
+    [
+        ("dftracer", "dlio", "tests/data/extracted/dftracer-dlio"),
+        ("recorder", "posix", "tests/data/extracted/recorder-posix-parquet"),
+    ],
+)
+def test_e2e_categorical_strings(analyzer: str, preset: str, trace_path: str, tmp_path: pathlib.Path) -> None:
+    """Test that the dictionary-encoded string columns give the same flat views."""
+    expected_result, _ = _test_e2e(analyzer, preset, trace_path, False, 0.95, tmp_path)
+    result, _ = _test_e2e(
+        analyzer,
+        preset,
+        trace_path,
+        True,
+        0.95,
+        tmp_path,
+        extra_overrides=["analyzer.categorical_strings=true"],
+    )
+    # The high-level metrics hold dictionary codes, only the decoded flat views match
+    _assert_flat_views_equal(expected_result, result, check_dtype=False)
+
+
+@pytest.mark.full
+def test_e2e_approximate_unique(tmp_path: pathlib.Path) -> None:
+    """Test that the HyperLogLog distinct counts are within their error of the exact counts."""
+    exact_result, _ = _test_e2e("dftracer", "dlio", "tests/data/extracted/dftracer-dlio", False, 0.95, tmp_path)
+    result, _ = _test_e2e(
+        "dftracer",
+        "dlio",
+        "tests/data/extracted/dftracer-dlio",
+        False,
+        0.95,
+        tmp_path,
+        extra_overrides=["analyzer.approximate_unique=true"],
+    )
+    assert exact_result.flat_views.keys() == result.flat_views.keys()
+    nunique_count = 0
+    for view_key in exact_result.flat_views:
+        exact_view = _comparable_frame(exact_result.flat_views[view_key])
+        view = _comparable_frame(result.flat_views[view_key])
+        assert len(view) == len(exact_view)
+        for col in [col for col in exact_view.columns if col.endswith("_nunique")]:
+            # Three times the relative standard error of about 1.6%, small counts are close to exact
+            pd.testing.assert_series_equal(
+                view[col].astype("Float64"),
+                exact_view[col].astype("Float64"),
+                rtol=0.05,
+                atol=1,
+            )
+            nunique_count += 1
+    assert nunique_count > 0
+
+
+@pytest.mark.full
+def test_e2e_exact_quantiles(tmp_path: pathlib.Path) -> None:
+    """Test that the t-digest trimmed view statistics are close to the exact ones."""
+    exact_result, _ = _test_e2e(
+        "dftracer",
+        "dlio",
+        "tests/data/extracted/dftracer-dlio",
+        False,
+        0.95,
+        tmp_path,
+        extra_overrides=["analyzer.exact_quantiles=true"],
+    )
+    result, _ = _test_e2e("dftracer", "dlio", "tests/data/extracted/dftracer-dlio", False, 0.95, tmp_path)
+    assert exact_result.flat_views.keys() == result.flat_views.keys()
+    stats_count = 0
+    for view_key in exact_result.flat_views:
+        exact_view = _comparable_frame(exact_result.flat_views[view_key])
+        view = _comparable_frame(result.flat_views[view_key])
+        assert len(view) == len(exact_view)
+        for col in [col for col in exact_view.columns if col.endswith("_stats_mean")]:
+            pd.testing.assert_series_equal(view[col], exact_view[col], rtol=0.05)
+            stats_count += 1
+    assert stats_count > 0
+
+
+@pytest.mark.full
+def test_e2e_incremental(tmp_path: pathlib.Path) -> None:
+    """Test that folding new trace files into the checkpointed high-level metrics matches a full recompute."""
+    trace_path = tmp_path / "traces"
+    trace_path.mkdir()
+    trace_files = sorted(glob("tests/data/extracted/dftracer-dlio/*.pfw"))
+    # Incremental runs keep the time origin of the first files, which hold the earliest event here
+    for trace_file in trace_files[::2]:
+        shutil.copy(trace_file, trace_path)
+    _test_e2e("dftracer", "dlio", str(trace_path), True, 0.95, tmp_path, extra_overrides=["analyzer.incremental=true"])
+    for trace_file in trace_files[1::2]:
+        shutil.copy(trace_file, trace_path)
+    result = _test_e2e(
+        "dftracer",
+        "dlio",
+        str(trace_path),
+        True,
+        0.95,
+        tmp_path,
+        extra_overrides=["analyzer.incremental=true"],
+    )
+    expected = _test_e2e("dftracer", "dlio", str(trace_path), False, 0.95, tmp_path)
+    # The folded metrics are restored from their Parquet checkpoint
+    _assert_results_equal(expected, result, check_dtype=False)
+
+
+@pytest.mark.full
+@pytest.mark.parametrize("trace_cache", [True, False])
+def test_e2e_streaming(trace_cache: bool, tmp_path: pathlib.Path) -> None:
+    """Test that folding the traces in one small chunk at a time matches reading them at once."""
+    extra_overrides = ["analyzer.streaming=true", "analyzer.streaming_chunk_size=1"]
+    if trace_cache:
+        extra_overrides.append(f"analyzer.trace_cache_dir={tmp_path}/trace_cache")
+    expected = _test_e2e("dftracer", "dlio", "tests/data/extracted/dftracer-dlio", False, 0.95, tmp_path)
+    result = _test_e2e(
+        "dftracer",
+        "dlio",
+        "tests/data/extracted/dftracer-dlio",
+        True,
+        0.95,
+        tmp_path,
+        extra_overrides=extra_overrides,
+    )
+    # The streamed metrics are restored from their Parquet checkpoint
+    _assert_results_equal(expected, result, check_dtype=False)
+
+
+@pytest.mark.full
+def test_e2e_trace_manifest(tmp_path: pathlib.Path) -> None:
+    """Test writing a trace manifest and reading the same traces through it."""
+    trace_manifest = f"{tmp_path}/manifest.parquet"
+    expected = _test_e2e(
+        "dftracer",
+        "dlio",
+        "tests/data/extracted/dftracer-dlio",
+        False,
+        0.95,
+        tmp_path,
+        extra_overrides=[f"analyzer.trace_manifest={trace_manifest}"],
+    )
+    assert pathlib.Path(trace_manifest).is_file()
+    trace_files = sorted(glob(f"{pathlib.Path('tests/data/extracted/dftracer-dlio').absolute()}/*.pfw"))
+    assert sorted(pd.read_parquet(trace_manifest)["path"]) == trace_files
+    result = _test_e2e("dftracer", "dlio", trace_manifest, False, 0.95, tmp_path)
+    _assert_results_equal(expected, result)
+
+
+@pytest.mark.full
+def test_e2e_trace_cache(tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test caching the parsed traces and analyzing them again from the cache without parsing."""
+    trace_cache_dir = f"{tmp_path}/trace_cache"
+    expected = _test_e2e(
+        "dftracer",
+        "dlio",
+        "tests/data/extracted/dftracer-dlio",
+        False,
+        0.95,
+        tmp_path,
+        extra_overrides=["analyzer.time_granularity=5e6"],
+    )
+    results = []
+    for time_granularity in [1e6, 5e6]:
+        results.append(
+            _test_e2e(
+                "dftracer",
+                "dlio",
+                "tests/data/extracted/dftracer-dlio",
+                False,
+                0.95,
+                tmp_path,
+                extra_overrides=[
+                    f"analyzer.trace_cache_dir={trace_cache_dir}",
+                    f"analyzer.time_granularity={time_granularity}",
+                ],
+            )
+        )
+        assert len(glob(f"{trace_cache_dir}/*.parquet")) == 1
+        # The cache is shared by all time granularities, so the next run must not parse the traces
+        monkeypatch.setattr(
+            DFTracerAnalyzer,
+            "parse_trace",
+            lambda *args, **kwargs: pytest.fail("Traces were parsed again instead of read from the cache"),
+        )
+    _assert_results_equal(expected, results[-1], check_dtype=False)
+
+
+@pytest.mark.full
+def test_e2e_converted_trace(tmp_path: pathlib.Path) -> None:
+    """Test converting traces to Parquet and analyzing the converted traces."""
+    converted_path = f"{tmp_path}/converted"
+    dfa = init_with_hydra(
+        hydra_overrides=[
+            "analyzer=dftracer",
+            "analyzer/preset=dlio",
+            "analyzer.checkpoint=false",
+            f"hydra.run.dir={tmp_path}",
+            f"hydra.runtime.output_dir={tmp_path}",
+            "trace_path=tests/data/extracted/dftracer-dlio",
+        ]
+    )
+    dfa.analyzer.convert_trace(trace_path="tests/data/extracted/dftracer-dlio", output_dir=converted_path)
+    dfa.shutdown()
+    assert pathlib.Path(f"{converted_path}/global.json").is_file()
+    _test_e2e("dftracer", "dlio", converted_path, False, 0.95, tmp_path)
+
+
+@pytest.mark.full
+@pytest.mark.parametrize("trace_cache", [True, False])
+def test_e2e_time_window(trace_cache: bool, tmp_path: pathlib.Path) -> None:
+    """Test analyzing a time window of the traces, with and without pruning cached row groups."""
+    extra_overrides = ["analyzer.time_window=[0,5]"]
+    if trace_cache:
+        extra_overrides.append(f"analyzer.trace_cache_dir={tmp_path}/trace_cache")
+    expected_result, _ = _test_e2e("dftracer", "dlio", "tests/data/extracted/dftracer-dlio", False, 0.95, tmp_path)
+    result, _ = _test_e2e(
+        "dftracer",
+        "dlio",
+        "tests/data/extracted/dftracer-dlio",
+        False,
+        0.95,
+        tmp_path,
+        extra_overrides=extra_overrides,
+    )
+    assert 0 < result.raw_stats.total_count < expected_result.raw_stats.total_count
+    assert len(result.flat_views[("time_range",)]) < len(expected_result.flat_views[("time_range",)])
+
+
+@pytest.mark.full
+def test_e2e_dftracer_reader_engine(tmp_path: pathlib.Path) -> None:
+    """Test that both DFTracer reader engines give identical results."""
+    bag, partitioned = [
+        _test_e2e(
+            "dftracer",
+            "dlio",
+            "tests/data/extracted/dftracer-dlio",
+            False,
+            0.95,
+            tmp_path,
+            extra_overrides=[f"analyzer.reader_engine={reader_engine}"],
+        )
+        for reader_engine in ["bag", "partitioned"]
+    ]
+    _assert_results_equal(bag, partitioned)
+
+
 def _test_e2e(
     analyzer: str,
     preset: str,
@@ -75,8 +327,14 @@ def _test_e2e(
     checkpoint: bool,
     percentile: float,
     tmp_path: pathlib.Path,
-) -> None:
-    """Common test logic extracted to avoid duplication."""
+    extra_overrides: Optional[List[str]] = None,
+) -> Tuple[AnalyzerResultType, Dict[str, pd.DataFrame]]:
+    """Common test logic extracted to avoid duplication.
+
+    Returns the analysis result along with its high-level metrics per layer,
+    which are computed before the cluster is shut down so that the results
+    of different runs can be compared.
+    """
     checkpoint_dir = f"{tmp_path}/checkpoints"
 
     view_types = ["proc_name", "time_range"]
@@ -94,6 +352,7 @@ def _test_e2e(
             f"percentile={percentile}",
             f"trace_path={trace_path}",
             f"view_types=[{','.join(view_types)}]",
+            *(extra_overrides or []),
         ]
     )
 
@@ -115,5 +374,76 @@ def _test_e2e(
     if checkpoint:
         assert any(glob(f"{result.checkpoint_dir}/*.json")), "No checkpoint found"
 
+    (hlms,) = dask.compute(result._hlms)
+
     # Shutdown the Dask client and cluster
     dfa.shutdown()
+
+    return result, hlms
+
+
+def _assert_results_equal(
+    left: Tuple[AnalyzerResultType, Dict[str, pd.DataFrame]],
+    right: Tuple[AnalyzerResultType, Dict[str, pd.DataFrame]],
+    check_dtype: bool = True,
+) -> None:
+    """Asserts that two runs have the same raw stats, high-level metrics and flat views."""
+    (left_result, left_hlms), (right_result, right_hlms) = left, right
+    assert left_result.raw_stats.total_count == right_result.raw_stats.total_count
+    assert left_result.raw_stats.job_time == pytest.approx(right_result.raw_stats.job_time)
+    assert left_hlms.keys() == right_hlms.keys()
+    for layer in left_hlms:
+        _assert_frames_equal(left_hlms[layer], right_hlms[layer], check_dtype=check_dtype)
+    _assert_flat_views_equal(left_result, right_result, check_dtype=check_dtype)
+
+
+def _assert_flat_views_equal(
+    left_result: AnalyzerResultType,
+    right_result: AnalyzerResultType,
+    check_dtype: bool = True,
+) -> None:
+    assert left_result.flat_views.keys() == right_result.flat_views.keys()
+    for view_key in left_result.flat_views:
+        _assert_frames_equal(
+            left_result.flat_views[view_key],
+            right_result.flat_views[view_key],
+            check_dtype=check_dtype,
+        )
+
+
+def _assert_frames_equal(left: pd.DataFrame, right: pd.DataFrame, check_dtype: bool = True) -> None:
+    pd.testing.assert_frame_equal(
+        _comparable_frame(left),
+        _comparable_frame(right),
+        check_dtype=check_dtype,
+    )
+
+
+def _comparable_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Brings a result frame into an order-independent form.
+
+    Rows are sorted by their index levels and columns by name, since both
+    depend on the partitioning. Array cells are turned into tuples, and the
+    quantile stats into separate trimmed mean, std and count columns so
+    that they are compared with a float tolerance.
+    """
+    keys = sorted(name for name in df.index.names if name is not None)
+    df = df.reset_index(drop=len(keys) == 0)
+    for col in list(df.columns):
+        if col.endswith("_stats"):
+            stats = df.pop(col).map(lambda value: list(value) if _is_sequence(value) else [np.nan] * 3)
+            df[[f"{col}_mean", f"{col}_std", f"{col}_count"]] = pd.DataFrame(
+                stats.tolist(),
+                index=df.index,
+                dtype="float64",
+            )
+        elif df[col].dtype == object:
+            df[col] = df[col].map(lambda value: tuple(np.ravel(value).tolist()) if _is_sequence(value) else value)
+    df = df[sorted(df.columns)]
+    if len(keys) > 0:
+        df = df.sort_values(keys)
+    return df.reset_index(drop=True)
+
+
+def _is_sequence(value) -> bool:
+    return isinstance(value, (list, tuple, np.ndarray))
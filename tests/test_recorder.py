@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dfanalyzer.recorder import RecorderAnalyzer
+
+
+TRACE_PATH = "tests/data/extracted/recorder-posix-parquet"
+
+
+@pytest.mark.smoke
+@pytest.mark.full
+@pytest.mark.parametrize("time_granularity", [1e6, 1e7])
+def test_set_time_ranges(time_granularity: float) -> None:
+    """Test that the time ranges match digitizing `tmid` against the global bin array."""
+    tmid_min, tmid_max = RecorderAnalyzer._load_global_min_max(trace_path=TRACE_PATH)["tmid"]
+    bins = np.arange(tmid_min, tmid_max, time_granularity)
+    tmid = pd.read_parquet(TRACE_PATH, columns=["tmid"])["tmid"].to_numpy(dtype=np.float64)
+    # Values exactly on the bin edges, and the last value, belong to the bin they close
+    df = pd.DataFrame({"tmid": np.concatenate([tmid, bins, [tmid_max]])})
+    time_ranges = RecorderAnalyzer._set_time_ranges(df, tmid_min=tmid_min, time_granularity=time_granularity)
+    np.testing.assert_array_equal(
+        time_ranges["time_range"].to_numpy(),
+        np.digitize(df["tmid"], bins=bins, right=True),
+    )